@@ -1 +1,3 @@
 # FAONet package initialization
+
+__version__ = "0.2.0"
@@ -0,0 +1,313 @@
+import copy
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from faonet import __version__
+from faonet.network import BipartiteTradeNetwork, CountryIndex, _edge_arrays
+
+# Parameters that change how a metric is computed but not its result
+DEFAULT_IGNORED_PARAMS = ("workers",)
+
+# Sentinel for results absent from the cache (None is a valid result)
+_MISSING = object()
+
+
+def graph_fingerprint(G, weight="weight"):
+    """
+    Content hash of a trade network.
+
+    The hash covers the nodes with their 'bipartite' attribute, the edges and
+    their weights, and does not depend on the order in which nodes or edges
+    were added, so the same network rebuilt in another session (where set
+    iteration order may differ) gets the same fingerprint.
+
+    Parameters
+    ----------
+    G : networkx.Graph or BipartiteTradeNetwork
+        Network to hash.
+    weight : str, optional
+        Edge attribute holding the weight on NetworkX graphs.
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    if isinstance(G, BipartiteTradeNetwork):
+        coo = G.matrix.tocoo()
+        nodes = pd.DataFrame({
+            "node": [repr(node) for node in G.reporters] + [repr(node) for node in G.partners],
+            "bipartite": [0] * len(G.reporters) + [1] * len(G.partners),
+        })
+        edges = pd.DataFrame({
+            "source": nodes["node"].to_numpy()[coo.row],
+            "target": nodes["node"].to_numpy()[coo.col + len(G.reporters)],
+            "weight": coo.data,
+        })
+        digest.update(b"BipartiteTradeNetwork")
+    else:
+        labels, sources, targets, weights = _edge_arrays(G, weight)
+        names = pd.Series([repr(node) for node in labels], dtype=object)
+        nodes = pd.DataFrame({
+            "node": names,
+            "bipartite": [repr(G.nodes[node].get("bipartite")) for node in labels],
+        })
+        edges = pd.DataFrame({
+            "source": names.to_numpy()[sources],
+            "target": names.to_numpy()[targets],
+            "weight": weights,
+        })
+        if not G.is_directed():
+            # Undirected edges are stored with their endpoints in sorted order
+            swap = edges["source"] > edges["target"]
+            edges.loc[swap, ["source", "target"]] = edges.loc[swap, ["target", "source"]].to_numpy()
+        digest.update(type(G).__name__.encode())
+
+    for frame in (nodes.sort_values(list(nodes.columns)),
+                  edges.sort_values(list(edges.columns))):
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class MetricCache:
+    """
+    Cache of metric results keyed by graph content and parameters.
+
+    Results live in an in-memory LRU tier and, with `cache_dir`, in an
+    on-disk tier of pickle files that survives between sessions. The disk
+    tier is evicted least-recently-used first once it grows beyond
+    `max_bytes`.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Number of results kept in memory (default 128; 0 disables the tier).
+    cache_dir : str or path-like, optional
+        Directory of the on-disk tier. None keeps results in memory only.
+    max_bytes : int, optional
+        Size limit of the on-disk tier. None means no limit.
+
+    Examples
+    --------
+    >>> cache = MetricCache(cache_dir="faonet-cache", max_bytes=2**30)
+    >>> betweenness = cache.wrap(compute_betweenness_all)
+    >>> df = betweenness(G, engine="csr")   # computed
+    >>> df = betweenness(G, engine="csr")   # served from the cache
+    """
+
+    def __init__(self, maxsize=128, cache_dir=None, max_bytes=None):
+        self.maxsize = maxsize
+        self.cache_dir = None if cache_dir is None else os.fspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._evict_disk()
+
+    def key(self, func, G, params):
+        """
+        Cache key of `func` applied to `G` with the keyword `params`.
+
+        The key includes the FAONet version and a hash of the source of
+        `func`, so results stored on disk by other code are not served.
+        """
+        name = f"{func.__module__}.{func.__qualname__}"
+        items = sorted((k, _canonical(v)) for k, v in params.items())
+        text = f"{name}|{_code_version(func)}|{graph_fingerprint(G)}|{items}"
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key, default=None):
+        """Return a copy of the result stored under `key`, or `default`."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return copy.deepcopy(self._memory[key])
+        path = self._path(key)
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+            self._remember(key, value)
+            return copy.deepcopy(value)
+        return default
+
+    def set(self, key, value):
+        """Store `value` under `key` in both tiers."""
+        self._remember(key, copy.deepcopy(value))
+        path = self._path(key)
+        if path is not None:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self._evict_disk()
+
+    def clear(self):
+        """Remove every result from both tiers."""
+        self._memory.clear()
+        for path, _, _ in self._disk_entries():
+            os.remove(path)
+
+    def wrap(self, func, ignore=DEFAULT_IGNORED_PARAMS):
+        """
+        Cache the results of a metric function.
+
+        Parameters
+        ----------
+        func : callable
+            Metric taking the network as its first argument, e.g.
+            `compute_betweenness_all` or `compute_bipartite_clustering`.
+        ignore : iterable of str, optional
+            Parameters left out of the key because they do not change the
+            result (by default the number of worker processes).
+
+        Returns
+        -------
+        callable
+            Function with the signature of `func` that returns cached results
+            when the network content and the other arguments are unchanged.
+        """
+        signature = inspect.signature(func)
+        ignore = set(ignore)
+
+        @functools.wraps(func)
+        def cached(G, *args, **kwargs):
+            bound = signature.bind(G, *args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in list(bound.arguments.items())[1:]
+                      if name not in ignore}
+            key = self.key(func, G, params)
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            value = func(G, *args, **kwargs)
+            self.set(key, value)
+            return value
+
+        cached.cache = self
+        return cached
+
+    def _remember(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _disk_entries(self):
+        """(path, size, mtime) of every result file, oldest first."""
+        if self.cache_dir is None:
+            return []
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+        return sorted(entries, key=lambda e: e[2])
+
+    def _evict_disk(self):
+        if self.max_bytes is None:
+            return
+        entries = self._disk_entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def __len__(self):
+        return len(self._memory)
+
+    def __repr__(self):
+        return (f"MetricCache(maxsize={self.maxsize}, cache_dir={self.cache_dir!r}, "
+                f"hits={self.hits}, misses={self.misses})")
+
+
+def cached_metric(func=None, *, cache=None, ignore=DEFAULT_IGNORED_PARAMS):
+    """
+    Decorator form of `MetricCache.wrap`.
+
+    Without `cache`, each decorated function gets its own in-memory cache.
+
+    Examples
+    --------
+    >>> @cached_metric(cache=MetricCache(cache_dir="faonet-cache"))
+    ... def density(G):
+    ...     return nx.density(G)
+    """
+    def decorate(f):
+        return (cache if cache is not None else MetricCache()).wrap(f, ignore=ignore)
+
+    return decorate if func is None else decorate(func)
+
+
+@functools.lru_cache(maxsize=None)
+def _code_version(func):
+    """FAONet version and hash of the source (or bytecode) of `func`."""
+    try:
+        code = inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        code = getattr(getattr(func, "__code__", None), "co_code", b"")
+    return f"{__version__}:{hashlib.sha256(code).hexdigest()}"
+
+
+def _canonical(value):
+    """
+    Order-independent text of a parameter value, for cache keys.
+
+    Arrays and pandas objects are hashed by content (never by their repr,
+    which numpy and pandas truncate), and types that cannot be described
+    exactly raise TypeError rather than risk two values sharing a key.
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return repr(value)
+    if isinstance(value, np.generic):
+        return f"{value.dtype}:{value.item()!r}"
+    if isinstance(value, os.PathLike):
+        return repr(os.fspath(value))
+    if isinstance(value, (set, frozenset)):
+        return "{" + ", ".join(sorted(_canonical(v) for v in value)) + "}"
+    if isinstance(value, dict):
+        items = sorted((_canonical(k), _canonical(v)) for k, v in value.items())
+        return "{" + ", ".join(f"{k}: {v}" for k, v in items) + "}"
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__ + "(" + ", ".join(_canonical(v) for v in value) + ")"
+    if isinstance(value, (nx.Graph, BipartiteTradeNetwork)):
+        return graph_fingerprint(value)
+    if isinstance(value, CountryIndex):
+        return "CountryIndex(" + _canonical(value.to_frame()) + ")"
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            return f"ndarray{value.shape}(" + ", ".join(_canonical(v) for v in value.ravel()) + ")"
+        data = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return f"ndarray({value.dtype}, {value.shape}, {data})"
+    if isinstance(value, (pd.Series, pd.DataFrame, pd.Index)):
+        data = hashlib.sha256(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        dtypes = value.dtypes if isinstance(value, pd.DataFrame) else value.dtype
+        columns = list(value.columns) if isinstance(value, pd.DataFrame) else value.name
+        return (f"{type(value).__name__}({_canonical(str(dtypes))}, {_canonical(columns)}, "
+                f"{value.shape}, {data.hexdigest()})")
+    if callable(value) and "<" not in getattr(value, "__qualname__", "<"):
+        return f"{value.__module__}.{value.__qualname__}"
+    raise TypeError(f"Cannot build a cache key from a parameter of type "
+                    f"{type(value).__name__}; pass numbers, strings, containers, arrays "
+                    f"or pandas objects, or list the parameter in `ignore`")
@@ -1,4 +1,7 @@
-def filter_top_percentile(df, value_column="Value", percentile=0.9):
+import numpy as np
+import pandas as pd
+
+def filter_top_percentile(df, value_column="Value", percentile=0.9, by=None, top_k=None):
     """
     Filter a DataFrame to retain rows that account for a given cumulative percentile of a value column.
 
@@ -10,15 +13,45 @@ def filter_top_percentile(df, value_column="Value", percentile=0.9):
         Column name to use for cumulative sum and filtering (e.g., trade value).
     percentile : float
         Cumulative threshold to retain (between 0 and 1, e.g., 0.9 for top 90%).
+    by : str or list of str, optional
+        Column(s) defining groups (e.g. 'Year', 'Item' or 'Reporter Countries').
+        The percentile is then applied within each group, using one sort of
+        the value column and one group-by pass, without adding helper columns
+        or copying the sorted frame.
+    top_k : int, optional
+        If given, keep the `top_k` largest rows (per group when `by` is set)
+        instead of applying `percentile`. Uses partial selection (`nlargest`)
+        rather than a full sort.
 
     Returns
     -------
     pd.DataFrame
         Filtered DataFrame containing only the rows that fall within the specified cumulative percentile.
+        Without `by` and `top_k`, it also has the 'cumsum' and 'cumperc' columns used for filtering.
 
     """
+    if top_k is not None:
+        if by is None:
+            return df.nlargest(top_k, value_column)
+        values = pd.Series(df[value_column].to_numpy())
+        largest = values.groupby(_group_codes(df, by)).nlargest(top_k)
+        return df.iloc[np.sort(largest.index.get_level_values(-1))]
+
+    if by is not None:
+        values = df[value_column].to_numpy()
+        order = np.argsort(-values, kind="stable")
+        sorted_values = pd.Series(values[order])
+        groups = sorted_values.groupby(_group_codes(df, by)[order], sort=False)
+        cumperc = groups.cumsum() / groups.transform("sum")
+        return df.iloc[order[(cumperc <= percentile).to_numpy()]]
+
     df_sorted = df.sort_values(by=value_column, ascending=False)
     total_value = df_sorted[value_column].sum()
     df_sorted["cumsum"] = df_sorted[value_column].cumsum()
     df_sorted["cumperc"] = df_sorted["cumsum"] / total_value
     return df_sorted[df_sorted["cumperc"] <= percentile].copy()
+
+
+def _group_codes(df, by):
+    """Integer group label of each row of `df` for the column(s) `by`."""
+    return df.groupby(by, sort=False, dropna=False, observed=True).ngroup().to_numpy()
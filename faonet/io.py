@@ -1,33 +1,189 @@
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+from collections.abc import Mapping
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
 import pandas as pd
 
-def load_and_merge_csv(filepaths):
+# Rows parsed per chunk when streaming FAOSTAT CSV files
+DEFAULT_CHUNKSIZE = 500_000
+
+# Keyword filters accepted by the readers and the FAOSTAT column they act on
+_FILTER_COLUMNS = {
+    "year": "Year",
+    "item": "Item",
+    "element": "Element",
+    "flag": "Flag",
+}
+
+# Layout of the columnar cache written by `convert_to_parquet`
+_PARQUET_SCHEMA_FILE = "_common_metadata"
+_PARQUET_PARTITION_KEY = "faonet.partition_cols"
+_PARQUET_SAMPLE_ROWS = 10_000
+_PARQUET_MAX_PARTITIONS = 100_000
+# Row group and file sizes of the cache (the writer buffers rows per partition
+# until a row group is full)
+_PARQUET_ROWS_PER_GROUP = 128 * 1024
+_PARQUET_ROWS_PER_FILE = 8 * 128 * 1024
+
+
+def load_and_merge_csv(filepaths, cache_dir=None, workers=None, compact=False,
+                       float32=False, encoding=None):
     """
     Load and concatenate multiple FAOSTAT CSV files into a single DataFrame.
 
     Parameters
     ----------
     filepaths : list of str
-        List of paths to the CSV files.
+        List of paths to the CSV files. ZIP archives are read directly (see
+        `load_file`).
+    cache_dir : str or path-like, optional
+        Directory of the columnar cache (see `convert_to_parquet`). When
+        given, each file is served from its Parquet copy, which is created
+        on first use.
+    workers : int, optional
+        Number of worker processes used to parse the files concurrently.
+        None or 1 parses them sequentially in the current process.
+    compact : bool, optional
+        If True, load compact dtypes (see `compact_dtypes`). This also makes
+        the frames sent back by the workers much smaller.
+    float32 : bool, optional
+        With `compact`, also store float columns as float32.
+    encoding : str, optional
+        Text encoding of the CSV data, e.g. 'latin-1' for FAOSTAT bulk files.
 
     Returns
     -------
     pd.DataFrame
         A single DataFrame resulting from concatenation of all input files.
+        Categorical columns get the union of the categories of all files.
+    """
+
+    read = partial(_read_whole_file, cache_dir=cache_dir, compact=compact,
+                   float32=float32, encoding=encoding)
+    if workers is not None and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            dataframes = list(pool.map(read, filepaths))
+    else:
+        dataframes = [read(path) for path in filepaths]
+    return _concat_frames(dataframes, ignore_index=True)
+
+
+def iter_file_chunks(file, year=None, item=None, element=None, flag=None,
+                     usecols=None, chunksize=DEFAULT_CHUNKSIZE, compact=False,
+                     float32=False, member=None, encoding=None):
     """
+    Stream a FAOSTAT CSV file in chunks, filtering rows while parsing.
+
+    Only the rows matching every active filter are kept from each chunk, so
+    memory use is bounded by the chunk size plus the selected rows rather than
+    by the size of the whole file.
 
-    dataframes = [pd.read_csv(path) for path in filepaths]
-    return pd.concat(dataframes, ignore_index=True)
+    Parameters
+    ----------
+    file : str or path-like
+        Path to the CSV file, or to a ZIP archive containing it. Archive
+        members are decompressed on the fly, without extracting them to disk.
+    year : int or list of int, optional
+        Year(s) to keep (column 'Year'). None keeps all years.
+    item : str or list of str, optional
+        Item name(s) to keep (column 'Item'). None keeps all items.
+    element : str or list of str, optional
+        Element name(s) to keep (column 'Element'), e.g. 'Export quantity'.
+    flag : str or list of str, optional
+        Flag value(s) to keep (column 'Flag').
+    usecols : list of str, optional
+        Columns to return. Filter columns are read even when not listed here
+        and are dropped after filtering. None returns all columns.
+    chunksize : int, optional
+        Number of CSV rows parsed per chunk.
+    compact : bool, optional
+        If True, convert each chunk with `compact_dtypes`.
+    float32 : bool, optional
+        With `compact`, also store float columns as float32.
+    member : str, optional
+        CSV member to read when `file` is a ZIP archive. By default the only
+        CSV member, or the '(Normalized)' data file of a FAOSTAT bulk download.
+    encoding : str, optional
+        Text encoding of the CSV data, e.g. 'latin-1' for FAOSTAT bulk files.
 
-def load_file(file, year=2023):
+    Yields
+    ------
+    pd.DataFrame
+        Filtered chunks, keeping the original row numbers as index.
+    """
+    filters = _row_filters(year=year, item=item, element=element, flag=flag)
+
+    read_cols = None
+    if usecols is not None:
+        usecols = list(usecols)
+        read_cols = usecols + [col for col in filters if col not in usecols]
+
+    with _open_source(file, member) as source, \
+            pd.read_csv(source, usecols=read_cols, chunksize=chunksize,
+                        encoding=encoding) as reader:
+        for chunk in reader:
+            if filters:
+                mask = np.ones(len(chunk), dtype=bool)
+                for col, values in filters.items():
+                    mask &= chunk[col].isin(values).to_numpy()
+                chunk = chunk[mask]
+            if usecols is not None:
+                chunk = chunk[usecols]
+            if compact:
+                chunk = compact_dtypes(chunk, float32=float32)
+            yield chunk
+
+
+def load_file(file, year=2023, item=None, element=None, flag=None,
+              usecols=None, chunksize=DEFAULT_CHUNKSIZE, cache_dir=None,
+              compact=False, float32=False, member=None, encoding=None):
     """
     Load a single FAOSTAT CSV file and filter by a specific year.
 
+    The file is parsed in chunks and the filters are applied while reading,
+    so peak memory is proportional to the selected rows (see
+    `iter_file_chunks`). With `cache_dir`, the data is read from a
+    partitioned Parquet copy of the file instead, pruning partitions, row
+    groups and columns (see `convert_to_parquet`).
+
     Parameters
     ----------
     file : str or path-like
-        Path to the CSV file.
-    year : int, optional
-        Year to filter the data by (default is 2023).
+        Path to the CSV file, or to a ZIP archive containing it. Archive
+        members are decompressed on the fly, without extracting them to disk.
+    year : int or list of int, optional
+        Year(s) to filter the data by (default is 2023). None keeps all years.
+    item : str or list of str, optional
+        Item name(s) to keep. None keeps all items.
+    element : str or list of str, optional
+        Element name(s) to keep. None keeps all elements.
+    flag : str or list of str, optional
+        Flag value(s) to keep. None keeps all flags.
+    usecols : list of str, optional
+        Columns to load. None loads all columns.
+    chunksize : int, optional
+        Number of CSV rows parsed per chunk.
+    cache_dir : str or path-like, optional
+        Directory of the columnar cache. The Parquet copy is created on the
+        first call and reused while the CSV file is unchanged. Rows read from
+        the cache are not in file order and get a fresh RangeIndex.
+    compact : bool, optional
+        If True, return compact dtypes (see `compact_dtypes`). Chunks are
+        converted as they are read, so the full-width frame is never built.
+    float32 : bool, optional
+        With `compact`, also store float columns (e.g. 'Value') as float32.
+    member : str, optional
+        CSV member to read when `file` is a ZIP archive. By default the only
+        CSV member, or the '(Normalized)' data file of a FAOSTAT bulk download.
+    encoding : str, optional
+        Text encoding of the CSV data, e.g. 'latin-1' for FAOSTAT bulk files.
 
     Returns
     -------
@@ -35,8 +191,426 @@ def load_file(file, year=2023):
         DataFrame filtered to only include data from the specified year.
     """
 
-    dataframes = pd.read_csv(file)
-    return dataframes[dataframes['Year'] == year]
+    if cache_dir is not None:
+        dataset = convert_to_parquet(file, cache_dir, chunksize=chunksize,
+                                     member=member, encoding=encoding)
+        filters = _row_filters(year=year, item=item, element=element, flag=flag)
+        df = _read_parquet_dataset(dataset, filters, usecols=usecols)
+        return compact_dtypes(df, float32=float32) if compact else df
+
+    chunks = iter_file_chunks(file, year=year, item=item, element=element,
+                              flag=flag, usecols=usecols, chunksize=chunksize,
+                              compact=compact, float32=float32, member=member,
+                              encoding=encoding)
+    return _collect_chunks(chunks, columns=usecols)
+
+
+def load_years(file, years=None, item=None, element=None, flag=None,
+               usecols=None, chunksize=DEFAULT_CHUNKSIZE, lazy=False,
+               compact=False, float32=False, member=None, encoding=None):
+    """
+    Load a FAOSTAT CSV file in a single pass and split it by year.
+
+    This replaces calling `load_file(file, year=y)` once per year: the file is
+    parsed only once and every chunk is routed to the partition of its year.
+    The result can be passed directly to the multi-year plotting helpers that
+    take year -> DataFrame dictionaries.
+
+    Parameters
+    ----------
+    file : str or path-like
+        Path to the CSV file, or to a ZIP archive containing it. Archive
+        members are decompressed on the fly, without extracting them to disk.
+    years : int or list of int, optional
+        Years to keep. None keeps all years present in the file.
+    item : str or list of str, optional
+        Item name(s) to keep. None keeps all items.
+    element : str or list of str, optional
+        Element name(s) to keep. None keeps all elements.
+    flag : str or list of str, optional
+        Flag value(s) to keep. None keeps all flags.
+    usecols : list of str, optional
+        Columns to load. 'Year' is always loaded. None loads all columns.
+    chunksize : int, optional
+        Number of CSV rows parsed per chunk.
+    lazy : bool, optional
+        If True, return a `YearPartitions` mapping that concatenates the
+        chunks of each year only when that year is first accessed.
+    compact : bool, optional
+        If True, return compact dtypes (see `compact_dtypes`).
+    float32 : bool, optional
+        With `compact`, also store float columns as float32.
+    member : str, optional
+        CSV member to read when `file` is a ZIP archive. By default the only
+        CSV member, or the '(Normalized)' data file of a FAOSTAT bulk download.
+    encoding : str, optional
+        Text encoding of the CSV data, e.g. 'latin-1' for FAOSTAT bulk files.
+
+    Returns
+    -------
+    dict or YearPartitions
+        Mapping from year to the DataFrame of that year, sorted by year.
+    """
+    if usecols is not None and "Year" not in usecols:
+        usecols = list(usecols) + ["Year"]
+
+    partitions = YearPartitions()
+    for chunk in iter_file_chunks(file, year=years, item=item, element=element,
+                                  flag=flag, usecols=usecols, chunksize=chunksize,
+                                  compact=compact, float32=float32, member=member,
+                                  encoding=encoding):
+        for year, part in chunk.groupby("Year", sort=False, observed=True):
+            partitions.add_chunk(year, part)
+
+    if lazy:
+        return partitions
+    return {year: partitions[year] for year in partitions}
+
+
+class YearPartitions(Mapping):
+    """
+    Read-only year -> DataFrame mapping filled by `load_years`.
+
+    Chunks are stored as parsed and concatenated the first time a year is
+    accessed, so years that are never used are never assembled.
+    """
+
+    def __init__(self):
+        self._chunks = {}
+        self._frames = {}
+
+    def add_chunk(self, year, chunk):
+        """Append a parsed chunk to the partition of `year`."""
+        self._frames.pop(year, None)
+        self._chunks.setdefault(year, []).append(chunk)
+
+    def __getitem__(self, year):
+        if year not in self._frames:
+            chunks = self._chunks[year]
+            self._frames[year] = _collect_chunks(chunks)
+            self._chunks[year] = [self._frames[year]]
+        return self._frames[year]
+
+    def __iter__(self):
+        return iter(sorted(self._chunks))
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def __repr__(self):
+        return f"YearPartitions(years={list(self)})"
+
+
+def compact_dtypes(df, float32=False):
+    """
+    Convert a FAOSTAT DataFrame to compact column types.
+
+    Text columns (country, item, element, unit and flag names) become
+    categoricals, integer columns (M49 and item codes, years) are downcast to
+    the narrowest integer type that holds their values and, optionally, float
+    columns are stored as float32. Use `memory_report` to see the savings.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input DataFrame.
+    float32 : bool, optional
+        If True, also convert float columns (e.g. 'Value') to float32. This
+        trades precision for memory.
+
+    Returns
+    -------
+    pd.DataFrame
+        A new DataFrame with compact dtypes.
+    """
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            columns[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            if float32:
+                columns[col] = series.astype(np.float32)
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            columns[col] = series.astype("category")
+    return df.assign(**columns) if columns else df.copy()
+
+
+def memory_report(original, compacted):
+    """
+    Compare the memory footprint of two versions of a DataFrame.
+
+    Parameters
+    ----------
+    original : pd.DataFrame
+        DataFrame as loaded with default dtypes.
+    compacted : pd.DataFrame
+        The same data with compact dtypes (see `compact_dtypes`).
+
+    Returns
+    -------
+    pd.DataFrame
+        Bytes per column with columns ['before', 'after', 'saved', 'ratio']
+        and a final 'Total' row.
+    """
+    report = pd.DataFrame({
+        "before": original.memory_usage(deep=True, index=False),
+        "after": compacted.memory_usage(deep=True, index=False),
+    })
+    report.loc["Total"] = report.sum()
+    report["saved"] = report["before"] - report["after"]
+    report["ratio"] = report["before"] / report["after"]
+    return report
+
+
+def convert_to_parquet(file, cache_dir, partition_cols=("Year",),
+                       chunksize=DEFAULT_CHUNKSIZE, member=None, encoding=None):
+    """
+    Convert a FAOSTAT CSV file to a partitioned Parquet dataset.
+
+    The dataset is written under `cache_dir` in a directory named after the
+    file and keyed by its path, size and modification time, so an unchanged
+    file is converted only once and an edited file gets a fresh copy.
+    Requires the optional dependency `pyarrow`.
+
+    Parameters
+    ----------
+    file : str or path-like
+        Path to the CSV file, or to a ZIP archive containing it. Archive
+        members are decompressed on the fly, without extracting them to disk.
+    cache_dir : str or path-like
+        Directory where converted datasets are stored.
+    partition_cols : tuple of str, optional
+        Columns used for hive-style partitioning (default: Year). Columns
+        missing from the file are skipped. Within each partition, rows are
+        sorted by Item chunk by chunk, so row-group statistics can skip
+        items; partitioning by Item as well gives many small files on real
+        FAOSTAT data, which are slower to read than the CSV.
+    chunksize : int, optional
+        Number of CSV rows parsed per chunk during conversion.
+    member : str, optional
+        CSV member to read when `file` is a ZIP archive. By default the only
+        CSV member, or the '(Normalized)' data file of a FAOSTAT bulk download.
+    encoding : str, optional
+        Text encoding of the CSV data, e.g. 'latin-1' for FAOSTAT bulk files.
+
+    Returns
+    -------
+    str
+        Path to the dataset directory.
+
+    Notes
+    -----
+    Codes and years are stored as int64, other numeric columns as float64
+    and everything else as strings, so the column types do not depend on
+    which rows end up in each chunk. The chunks are streamed into a single
+    dataset writer, which keeps one file open per partition.
+    """
+    pa, ds, pq = _import_pyarrow()
+
+    target = _parquet_cache_path(file, cache_dir, member=member)
+    if os.path.exists(os.path.join(target, _PARQUET_SCHEMA_FILE)):
+        return target
+    shutil.rmtree(target, ignore_errors=True)
+
+    with _open_source(file, member) as source:
+        sample = pd.read_csv(source, nrows=_PARQUET_SAMPLE_ROWS, encoding=encoding)
+    partition_cols = [col for col in partition_cols if col in sample.columns]
+    schema = _parquet_schema(sample, partition_cols)
+    partitioning = ds.partitioning(
+        pa.schema([schema.field(col) for col in partition_cols]), flavor="hive")
+    text_dtypes = {field.name: str for field in schema if pa.types.is_string(field.type)}
+
+    tmp = target + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    sort_cols = [col for col in dict.fromkeys(partition_cols + ["Item"]) if col in sample.columns]
+
+    def batches(reader):
+        for chunk in reader:
+            if sort_cols:
+                chunk = chunk.sort_values(sort_cols, kind="stable")
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            yield from table.to_batches()
+
+    with _open_source(file, member) as source, \
+            pd.read_csv(source, dtype=text_dtypes, chunksize=chunksize,
+                        encoding=encoding) as reader:
+        ds.write_dataset(pa.RecordBatchReader.from_batches(schema, batches(reader)), tmp,
+                         format="parquet", partitioning=partitioning,
+                         basename_template="part-{i}.parquet",
+                         existing_data_behavior="overwrite_or_ignore",
+                         max_partitions=_PARQUET_MAX_PARTITIONS,
+                         min_rows_per_group=_PARQUET_ROWS_PER_GROUP,
+                         max_rows_per_group=_PARQUET_ROWS_PER_GROUP,
+                         max_rows_per_file=_PARQUET_ROWS_PER_FILE)
+
+    # The schema file marks the conversion as complete
+    pq.write_metadata(schema, os.path.join(tmp, _PARQUET_SCHEMA_FILE))
+    os.replace(tmp, target)
+    return target
+
+
+def _as_list(value):
+    """Wrap a scalar filter value in a list, leaving iterables as lists."""
+    if isinstance(value, (str, bytes)) or not hasattr(value, "__iter__"):
+        return [value]
+    return list(value)
+
+
+def _row_filters(**values):
+    """Map FAOSTAT column names to the accepted values of each active filter."""
+    return {_FILTER_COLUMNS[name]: _as_list(value)
+            for name, value in values.items() if value is not None}
+
+
+def _collect_chunks(chunks, columns=None):
+    """Concatenate filtered chunks, discarding the empty ones as they arrive."""
+    frames = []
+    empty = None
+    for chunk in chunks:
+        if len(chunk):
+            frames.append(chunk)
+        elif empty is None:
+            empty = chunk
+
+    if not frames:
+        return empty if empty is not None else pd.DataFrame(columns=columns)
+    if len(frames) == 1:
+        return frames[0]
+    return _concat_frames(frames)
+
+
+def _concat_frames(frames, ignore_index=False):
+    """
+    Concatenate frames, keeping categorical columns categorical.
+
+    Plain `pd.concat` falls back to object dtype when the categories of a
+    column differ between frames, so every part first gets the union of the
+    categories.
+    """
+    columns = dict.fromkeys(col for frame in frames for col in frame.columns)
+    unified = {}
+    for col in columns:
+        parts = [frame[col] for frame in frames if col in frame]
+        if len(parts) == len(frames) and all(
+                isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            categories = parts[0].cat.categories
+            for part in parts[1:]:
+                categories = categories.append(part.cat.categories.difference(categories))
+            unified[col] = categories
+
+    if unified:
+        frames = [frame.assign(**{col: frame[col].cat.set_categories(categories)
+                                  for col, categories in unified.items()})
+                  for frame in frames]
+    return pd.concat(frames, ignore_index=ignore_index)
+
+
+def _read_whole_file(path, cache_dir=None, compact=False, float32=False,
+                     encoding=None):
+    """Read every row of one file for `load_and_merge_csv`."""
+    if cache_dir is None and not compact and not _is_zip(path):
+        return pd.read_csv(path, encoding=encoding)
+    return load_file(path, year=None, cache_dir=cache_dir, compact=compact,
+                     float32=float32, encoding=encoding)
+
+
+@contextmanager
+def _open_source(file, member=None):
+    """Yield something `pd.read_csv` can read, streaming ZIP members when needed."""
+    if not _is_zip(file):
+        yield file
+        return
+    with zipfile.ZipFile(file) as archive:
+        with archive.open(_zip_member(archive, member)) as stream:
+            yield stream
+
+
+def _is_zip(file):
+    """Return True if `file` is a path to a ZIP archive."""
+    return isinstance(file, (str, os.PathLike)) and os.fspath(file).lower().endswith(".zip")
+
+
+def _zip_member(archive, member=None):
+    """Pick the CSV member of a FAOSTAT bulk download to read."""
+    if member is not None:
+        return member
+
+    names = [name for name in archive.namelist() if name.lower().endswith(".csv")]
+    if len(names) == 1:
+        return names[0]
+    normalized = [name for name in names if "(normalized)" in name.lower()]
+    if len(normalized) == 1:
+        return normalized[0]
+    raise ValueError(
+        f"Cannot choose the CSV member of {archive.filename}; "
+        f"pass member= with one of {names}"
+    )
+
+
+def _import_pyarrow():
+    """Import the optional pyarrow modules used by the Parquet cache."""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError(
+            "The Parquet cache requires pyarrow. Install it with `pip install pyarrow`."
+        ) from exc
+    return pa, ds, pq
+
+
+def _parquet_cache_path(file, cache_dir, member=None):
+    """Return the dataset directory of `file`, keyed by its path, size and mtime."""
+    file = os.path.abspath(os.fspath(file))
+    stat = os.stat(file)
+    key = f"{file}|{member}|{stat.st_size}|{stat.st_mtime_ns}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(file))[0]
+    return os.path.join(os.fspath(cache_dir), f"{stem}-{digest}")
+
+
+def _parquet_schema(sample, partition_cols):
+    """Build a stable Arrow schema for a FAOSTAT file from a sample of its rows."""
+    import pyarrow as pa
+
+    fields = []
+    for col in sample.columns:
+        series = sample[col]
+        numeric = pd.api.types.is_numeric_dtype(series) and not series.isna().all()
+        if numeric and (col == "Year" or "Code" in col):
+            fields.append(pa.field(col, pa.int64()))
+        elif numeric:
+            fields.append(pa.field(col, pa.float64()))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    metadata = {_PARQUET_PARTITION_KEY: json.dumps(list(partition_cols))}
+    return pa.schema(fields, metadata=metadata)
+
+
+def _read_parquet_dataset(path, filters, usecols=None):
+    """Read the rows matching `filters` from a dataset written by `convert_to_parquet`."""
+    pa, ds, pq = _import_pyarrow()
+
+    schema = pq.read_schema(os.path.join(path, _PARQUET_SCHEMA_FILE))
+    partition_cols = json.loads(schema.metadata[_PARQUET_PARTITION_KEY.encode()])
+    partitioning = ds.partitioning(
+        pa.schema([schema.field(col) for col in partition_cols]), flavor="hive")
+    dataset = ds.dataset(path, schema=schema, format="parquet", partitioning=partitioning)
+
+    expression = None
+    for col, values in filters.items():
+        condition = ds.field(col).isin(values)
+        expression = condition if expression is None else expression & condition
+
+    columns = list(usecols) if usecols is not None else schema.names
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
 
 
 def save_dataframe(df, filepath):
@@ -1,8 +1,30 @@
 import pandas as pd
 import networkx as nx
-from networkx.algorithms import bipartite
+import heapq
 import itertools
+import math
+import random
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import scipy.sparse as sp
+
+from faonet.network import BipartiteTradeNetwork, _adjacency, _edge_arrays, weighted_projection
+
+# Weight-to-distance transforms accepted by `edge_lengths`
+WEIGHT_TRANSFORMS = ("inverse", "neglog", "normalized_inverse")
+
+# Columns of `compute_betweenness_all`: graph ('bip', 'exp' or 'imp' projection)
+# and whether distances come from transformed weights
+BETWEENNESS_METRICS = {
+    "betweenness_bipartite": ("bip", False),
+    "betweenness_bipartite_inv": ("bip", True),
+    "betweenness_proj_exporters": ("exp", False),
+    "betweenness_proj_exporters_inv": ("exp", True),
+    "betweenness_proj_importers": ("imp", False),
+    "betweenness_proj_importers_inv": ("imp", True),
+}
+
 
 def degree_by_group(G, group_nodes):
     """
@@ -25,18 +47,24 @@ def degree_by_group(G, group_nodes):
 
 
 
-def compute_degree_and_strength(B, reporters, partners):
+def compute_degree_and_strength(B, reporters=None, partners=None):
     """
     Compute the degree and strength (sum of edge weights) for nodes in a bipartite network.
 
+    Degrees and strengths are obtained with array operations: bincounts over
+    the edge list of a NetworkX graph, or row and column sums of the
+    biadjacency matrix of a `BipartiteTradeNetwork`.
+
     Parameters
     ----------
-    B : networkx.Graph
+    B : networkx.Graph or BipartiteTradeNetwork
         Bipartite graph with weights on the edges (under the 'weight' attribute).
-    reporters : set
-        Set of nodes in one bipartite group (e.g., exporters).
-    partners : set
-        Set of nodes in the other bipartite group (e.g., importers).
+    reporters : set, optional
+        Set of nodes in one bipartite group (e.g., exporters). Defaults to
+        the nodes with bipartite=0 (or the rows of a BipartiteTradeNetwork).
+    partners : set, optional
+        Set of nodes in the other bipartite group (e.g., importers). Defaults
+        to the other nodes (or the columns of a BipartiteTradeNetwork).
 
     Returns
     -------
@@ -44,40 +72,155 @@ def compute_degree_and_strength(B, reporters, partners):
         (df_exporters, df_importers):
         - df_exporters : DataFrame with 'Degree' and 'Strength' for reporter nodes.
         - df_importers : DataFrame with 'Degree' and 'Strength' for partner nodes.
-    
-    Compute degree and strength (sum of weights) for nodes in a bipartite network.
     """
-    # Compute strength: sum of edge weights per node
-    strength = {
-        node: sum(data['weight'] for _, _, data in B.edges(node, data=True))
-        for node in B.nodes()
-    }
+    if isinstance(B, BipartiteTradeNetwork):
+        df_exporters = pd.DataFrame({"Degree": B.degree(0), "Strength": B.strength(0)},
+                                    index=B.reporters)
+        df_importers = pd.DataFrame({"Degree": B.degree(1), "Strength": B.strength(1)},
+                                    index=B.partners)
+        if reporters is not None:
+            df_exporters = df_exporters.loc[list(reporters)]
+        if partners is not None:
+            df_importers = df_importers.loc[list(partners)]
+        return df_exporters, df_importers
+
+    if reporters is None:
+        reporters = {n for n, d in B.nodes(data=True) if d.get("bipartite") == 0}
+    if partners is None:
+        partners = set(B) - set(reporters)
+
+    nodes, sources, targets, weights = _edge_arrays(B, "weight")
+    n = len(nodes)
+
+    # Each edge counts for both endpoints; self-loops add their weight once
+    degree = np.bincount(sources, minlength=n) + np.bincount(targets, minlength=n)
+    strength = (np.bincount(sources, weights, minlength=n)
+                + np.bincount(targets, weights, minlength=n))
+    loops = sources == targets
+    if loops.any():
+        strength -= np.bincount(sources[loops], weights[loops], minlength=n)
+
+    position = {node: i for i, node in enumerate(nodes)}
+
+    def group_frame(group):
+        group = list(group)
+        idx = np.array([position[node] for node in group], dtype=np.int64)
+        return pd.DataFrame({"Degree": degree[idx], "Strength": strength[idx]},
+                            index=group)
+
+    return group_frame(reporters), group_frame(partners)
+
+
+
+def edge_lengths(G, transform="inverse", weight="weight"):
+    """
+    Shortest-path lengths derived from trade weights, without copying `G`.
 
-    # Compute degree using built-in function
-    degree = dict(B.degree())
+    Strong trade links should be short, so the weights are transformed into
+    distances on the fly instead of being stored as a new edge attribute:
 
-    # Separate by node group
-    exporters_strength = {node: strength[node] for node in reporters}
-    importers_strength = {node: strength[node] for node in partners}
-    exporters_degree = {node: degree[node] for node in reporters}
-    importers_degree = {node: degree[node] for node in partners}
+    - 'inverse': 1 / w
+    - 'neglog': -log(w / w_total)
+    - 'normalized_inverse': w_max / w
 
-    # Create dataframes
-    df_exporters = pd.DataFrame({
-        "Degree": pd.Series(exporters_degree),
-        "Strength": pd.Series(exporters_strength)
-    }).dropna()
+    where w_max and w_total are the largest and the total weight in `G`
+    (w_total rather than w_max keeps every length positive, which Brandes'
+    path counting needs). Edges with zero or negative weight carry no trade
+    and are hidden, i.e. their distance is infinite.
 
-    df_importers = pd.DataFrame({
-        "Degree": pd.Series(importers_degree),
-        "Strength": pd.Series(importers_strength)
-    }).dropna()
+    Parameters
+    ----------
+    G : networkx.Graph
+        Weighted graph.
+    transform : {'inverse', 'neglog', 'normalized_inverse'}, optional
+        Weight transform, see above.
+    weight : str, optional
+        Edge attribute holding the weight (missing weights count as 1).
 
-    return df_exporters, df_importers
+    Returns
+    -------
+    view : networkx.Graph
+        `G` itself or, when it has edges of non-positive weight, a read-only
+        view of `G` without them.
+    length : callable
+        Edge length function, to pass as `weight` to NetworkX shortest-path
+        and centrality functions called on `view`. It can be pickled.
+
+    Examples
+    --------
+    >>> view, length = edge_lengths(G, "neglog")
+    >>> bet = nx.betweenness_centrality(view, weight=length)
+    """
+    if transform not in WEIGHT_TRANSFORMS:
+        raise ValueError(f"transform must be one of {WEIGHT_TRANSFORMS}, got {transform!r}")
+    return _distance_graph(G, _WeightTransform.fit(G, transform, weight))
+
+
+class _WeightTransform:
+    """
+    Picklable edge length function of `edge_lengths`. The internal
+    'identity' transform uses the weights themselves as lengths.
+    """
 
+    def __init__(self, transform, weight="weight", scale=1.0):
+        self.transform = transform
+        self.weight = weight
+        self.scale = scale
+
+    @classmethod
+    def fit(cls, G, transform, weight="weight"):
+        """Transform scaled by the total ('neglog') or largest weight of `G`."""
+        if isinstance(G, _CSRGraph):
+            weights = sp.triu(G.matrix).data
+        else:
+            weights = [w for _, _, w in G.edges(data=weight, default=1)]
+        weights = [w for w in weights if w > 0]
+        if transform == "neglog":
+            scale = math.fsum(weights)
+        else:
+            scale = max(weights, default=1.0)
+        return cls(transform, weight, scale)
+
+    def lengths(self, weights):
+        """Vectorized transform of an array of positive weights."""
+        if self.transform == "identity":
+            return weights
+        if self.transform == "inverse":
+            return 1 / weights
+        if self.transform == "neglog":
+            return -np.log(weights / self.scale)
+        return self.scale / weights
+
+    def __call__(self, u, v, d):
+        w = d.get(self.weight, 1)
+        if self.transform == "identity":
+            return w
+        if self.transform == "inverse":
+            return 1 / w
+        if self.transform == "neglog":
+            return -math.log(w / self.scale)
+        return self.scale / w
+
+
+def _distance_graph(G, weight):
+    """
+    Graph and `weight` argument for NetworkX shortest-path functions.
 
+    Edges of non-positive weight are hidden with a view built from the edge
+    set found in one pass; graphs without such edges (the usual case) are
+    returned as they are, since every view lookup adds to Brandes' inner
+    loop. Real weights are passed as the attribute name, which NetworkX
+    reads faster than a length function.
+    """
+    hidden = [(u, v) for u, v, w in G.edges(data=weight.weight, default=1) if w <= 0]
+    if hidden:
+        G = nx.restricted_view(G, [], hidden)
+    return G, (weight.weight if weight.transform == "identity" else weight)
 
-def compute_betweenness_all(G):
+
+def compute_betweenness_all(G, workers=None, sample_size=None, epsilon=None,
+                            confidence=0.95, seed=None, transform="inverse",
+                            engine="networkx", metrics=None):
     """
     Compute multiple betweenness centrality measures for a bipartite network.
 
@@ -85,15 +228,54 @@ def compute_betweenness_all(G):
     - Betweenness in the full bipartite network using both real and inverted weights.
     - Betweenness in the projected graphs (for exporters and importers), again with real and inverted weights.
 
+    Edges with zero or negative weight carry no trade and are left out of
+    every measure, in both engines: Brandes' path counting is not well
+    defined on zero-length edges, where NetworkX's result depends on the
+    order of the neighbours.
+
     Parameters
     ----------
     G : networkx.Graph
         Bipartite graph with edge attribute 'weight'.
+    workers : int, optional
+        Number of worker processes. The source nodes of Brandes' algorithm
+        are split into chunks and the chunks of all six measures run
+        concurrently in a process pool; the partial sums are then added and
+        normalized as NetworkX does, giving the same values up to
+        floating-point rounding. None or 1 runs serially.
+    sample_size : int, optional
+        Approximate every measure from this many source nodes drawn without
+        replacement, instead of all nodes. The sums over the sample are
+        scaled by n / sample_size, which gives unbiased estimates.
+    epsilon : float, optional
+        Target absolute error of the approximation, as an alternative to
+        `sample_size`. The sample size of each measure is the smallest that
+        guarantees this error for all nodes at once with probability
+        `confidence` (Hoeffding bound with a union bound over the nodes).
+    confidence : float, default=0.95
+        Probability with which the reported error bounds hold.
+    seed : int, optional
+        Seed of the source sampling, for reproducible approximations.
+    transform : {'inverse', 'neglog', 'normalized_inverse'}, default='inverse'
+        Weight transform giving the distances of the '_inv' columns, see
+        `edge_lengths`.
+    engine : {'networkx', 'csr'}, default='networkx'
+        'networkx' runs `nx.betweenness_centrality`; 'csr' runs Brandes'
+        algorithm over the CSR arrays of the sparse adjacency and of the
+        projections (integer node ids, buffers reused across sources), which
+        gives the same values (up to floating-point rounding) without
+        per-node dict allocations.
+    metrics : list of str, optional
+        Betweenness columns to compute, among the keys of
+        `BETWEENNESS_METRICS` (default: all six). Only the projections and
+        weight transforms these columns need are built, and each is shared
+        by the columns that use it.
 
     Returns
     -------
     pd.DataFrame
-        DataFrame with one row per node and the following columns:
+        DataFrame with one row per node and the following columns (only the
+        requested betweenness columns, in the requested order):
         - 'node': Node identifier
         - 'bipartite_set': 0 if exporter, 1 if importer
         - 'betweenness_bipartite': Centrality in full bipartite graph (weights)
@@ -102,71 +284,395 @@ def compute_betweenness_all(G):
         - 'betweenness_proj_exporters_inv': Centrality in exporter projection (inverted weights)
         - 'betweenness_proj_importers': Centrality in importer projection (weights)
         - 'betweenness_proj_importers_inv': Centrality in importer projection (inverted weights)
+
+        In approximate mode, each betweenness column is followed by a
+        '<column>_error' column holding the achieved error bound: with
+        probability `confidence`, no value of the column is further than this
+        from the exact one.
     """
-    # Identify bipartite sets
-    exportadores = {n for n, d in G.nodes(data=True) if d.get("bipartite") == 0}
-    importadores = set(G) - exportadores
+    if sample_size is not None and epsilon is not None:
+        raise ValueError("Give either 'sample_size' or 'epsilon', not both")
+    if not 0 < confidence < 1:
+        raise ValueError("'confidence' must be between 0 and 1")
+    if epsilon is not None and epsilon <= 0:
+        raise ValueError("'epsilon' must be positive")
+    if transform not in WEIGHT_TRANSFORMS:
+        raise ValueError(f"transform must be one of {WEIGHT_TRANSFORMS}, got {transform!r}")
+    if engine not in ("networkx", "csr"):
+        raise ValueError(f"engine must be 'networkx' or 'csr', got {engine!r}")
+    if metrics is None:
+        metrics = list(BETWEENNESS_METRICS)
+    elif isinstance(metrics, str):
+        metrics = [metrics]
+    unknown = [m for m in metrics if m not in BETWEENNESS_METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metrics {unknown}; choose from {list(BETWEENNESS_METRICS)}")
+    metrics = list(dict.fromkeys(metrics))
+
+    # Bipartite graph and the projections needed by the requested metrics
+    # (exporters: bipartite == 0, importers: all others)
+    graphs = {}
+    for column in metrics:
+        name = BETWEENNESS_METRICS[column][0]
+        if name in graphs:
+            continue
+        if name == "bip":
+            graphs[name] = _CSRGraph(*_adjacency(G)[::2]) if engine == "csr" else G
+        else:
+            side = 0 if name == "exp" else 1
+            graphs[name] = (_CSRGraph(*weighted_projection(G, side)) if engine == "csr"
+                            else _projection_graph(G, side))
+
+    # Betweenness with real or inverted weights (computed on the fly, without
+    # copies), one job per requested column. NetworkX graphs are checked once
+    # for edges of non-positive weight, which are hidden from every column.
+    jobs, transforms, views = {}, {}, {}
+    real_weights = _WeightTransform("identity")
+    for column in metrics:
+        name, inverted = BETWEENNESS_METRICS[column]
+        weight = real_weights
+        if inverted:
+            if name not in transforms:
+                transforms[name] = _WeightTransform.fit(graphs[name], transform)
+            weight = transforms[name]
+        if engine == "csr":
+            jobs[column] = (graphs[name], weight)
+            continue
+        if name not in views:
+            views[name] = _distance_graph(graphs[name], real_weights)[0]
+        jobs[column] = (views[name], weight.weight if weight is real_weights else weight)
+
+    approximate = sample_size is not None or epsilon is not None
+    if approximate:
+        bet, errors = _sampled_betweenness(jobs, workers, sample_size, epsilon,
+                                           1 - confidence, seed)
+    elif engine == "csr" or (workers is not None and workers > 1):
+        bet = _exact_betweenness(jobs, workers)
+    else:
+        bet = {}
+        for name, (graph, weight) in jobs.items():
+            bet[name] = nx.betweenness_centrality(graph, weight=weight)
+
+    # Build results; nodes outside a projection get None
+    nodos = list(G.nodes())
+    df_bet = pd.DataFrame({
+        "node": nodos,
+        "bipartite_set": [G.nodes[n].get("bipartite") for n in nodos],
+    })
+    for column in metrics:
+        missing = 0 if BETWEENNESS_METRICS[column][0] == "bip" else None
+        df_bet[column] = [bet[column].get(n, missing) for n in nodos]
+        if approximate:
+            df_bet[f"{column}_error"] = errors[column]
 
-    # Invert weights for shortest-path based betweenness
-    G_inv = G.copy()
-    for u, v, d in G_inv.edges(data=True):
-        peso = d.get("weight", 1)
-        d["inv_weight"] = 1 / peso if peso > 0 else 0
+    return df_bet
 
-    # Betweenness in original bipartite network
-    bet_bip = nx.betweenness_centrality(G, weight="weight")
-    bet_bip_inv = nx.betweenness_centrality(G_inv, weight="inv_weight")
 
-    # Projected graphs
-    proy_exp = bipartite.weighted_projected_graph(G, exportadores)
-    proy_imp = bipartite.weighted_projected_graph(G, importadores)
+def _projection_graph(G, side):
+    """Shared-neighbour projection of `G` from `weighted_projection`, as a graph."""
+    nodes, P = weighted_projection(G, side)
+    links = sp.triu(P).tocoo()
+    projection = nx.Graph()
+    projection.add_nodes_from(nodes)
+    projection.add_weighted_edges_from(
+        (nodes[u], nodes[v], w) for u, v, w in zip(links.row, links.col, links.data.tolist()))
+    return projection
 
-    # Betweenness in projections (real weights)
-    bet_proy_exp = nx.betweenness_centrality(proy_exp, weight="weight")
-    bet_proy_imp = nx.betweenness_centrality(proy_imp, weight="weight")
 
-    # Invert weights in projections
-    for _, _, d in proy_exp.edges(data=True):
-        d["inv_weight"] = 1 / d["weight"] if d["weight"] > 0 else 0
-    for _, _, d in proy_imp.edges(data=True):
-        d["inv_weight"] = 1 / d["weight"] if d["weight"] > 0 else 0
+def _exact_betweenness(jobs, workers):
+    """
+    Run several betweenness computations from all their sources.
 
-    bet_proy_exp_inv = nx.betweenness_centrality(proy_exp, weight="inv_weight")
-    bet_proy_imp_inv = nx.betweenness_centrality(proy_imp, weight="inv_weight")
+    Each job is a (graph, weight) pair. With several workers, the sources of
+    every job are split into chunks that run in a process pool; the
+    unnormalized dependencies accumulated over the sources are normalized
+    like `nx.betweenness_centrality(normalized=True)`.
+    """
+    sources = {name: list(graph) for name, (graph, _) in jobs.items()}
+    totals = _betweenness_sums(jobs, sources, workers)
+    return {name: _normalized_betweenness(graph, totals[name])
+            for name, (graph, _) in jobs.items()}
 
-    # Build results
-    nodos = list(G.nodes())
-    df_bet = pd.DataFrame({
-        "node": nodos,
-        "bipartite_set": [G.nodes[n].get("bipartite") for n in nodos],
-        "betweenness_bipartite": [bet_bip.get(n, 0) for n in nodos],
-        "betweenness_bipartite_inv": [bet_bip_inv.get(n, 0) for n in nodos],
-        "betweenness_proj_exporters": [bet_proy_exp.get(n, None) for n in nodos],
-        "betweenness_proj_exporters_inv": [bet_proy_exp_inv.get(n, None) for n in nodos],
-        "betweenness_proj_importers": [bet_proy_imp.get(n, None) for n in nodos],
-        "betweenness_proj_importers_inv": [bet_proy_imp_inv.get(n, None) for n in nodos],
-    })
 
-    return df_bet
+def _sampled_betweenness(jobs, workers, sample_size, epsilon, delta, seed):
+    """
+    Estimate several betweenness computations from sampled sources.
+
+    Every estimate is an average of the dependencies of the sampled sources,
+    each lying in [0, 1] once normalized, so Hoeffding's inequality with a
+    union bound over the n nodes bounds the error of all nodes at once by
+    n / (n - 1) * sqrt(ln(2n / delta) / (2k)) with probability 1 - delta.
+
+    Returns
+    -------
+    tuple of dict
+        Estimated betweenness per job and the achieved error bound per job.
+    """
+    sources, errors = {}, {}
+    for name, (graph, _) in jobs.items():
+        nodes = list(graph)
+        n = len(nodes)
+        log_term = np.log(2 * n / delta) if n > 2 else 0.0
+        if epsilon is not None:
+            k = int(np.ceil((n / (n - 1)) ** 2 * log_term / (2 * epsilon ** 2))) if n > 2 else n
+        else:
+            k = sample_size
+        k = min(max(k, 1), n)
+        # Same seed for every job, so the two weightings of a graph share sources
+        sources[name] = random.Random(seed).sample(nodes, k) if n else []
+        errors[name] = 0.0 if k >= n else n / (n - 1) * np.sqrt(log_term / (2 * k))
+
+    totals = _betweenness_sums(jobs, sources, workers)
+    results = {}
+    for name, (graph, _) in jobs.items():
+        n, k = len(graph), len(sources[name])
+        scale = n / k if k else 1.0
+        results[name] = _normalized_betweenness(graph, totals[name] * scale)
+    return results, errors
+
+
+def _normalized_betweenness(graph, totals):
+    """Normalize the sums of `_betweenness_sums` like NetworkX, as a node dict."""
+    n = len(graph)
+    # betweenness_centrality_subset halves undirected sums; undo it
+    scale = 2 / ((n - 1) * (n - 2)) if n > 2 else 2
+    return dict(zip(graph, totals * scale))
+
+
+def _betweenness_sums(jobs, sources, workers):
+    """
+    Unnormalized betweenness of every job accumulated over its `sources`.
+
+    With several workers, the sources of every job are split into chunks that
+    run concurrently in a process pool.
+    """
+    graphs = {name: graph for name, (graph, _) in jobs.items()}
+    if workers is None or workers <= 1:
+        return {name: _subset_betweenness(graph, weight, sources[name])
+                for name, (graph, weight) in jobs.items()}
+
+    tasks = []
+    for name, (_, weight) in jobs.items():
+        n_chunks = min(workers, len(sources[name]))
+        for i in range(n_chunks):
+            tasks.append((name, weight, sources[name][i::n_chunks]))
+
+    totals = {name: np.zeros(len(graph)) for name, graph in graphs.items()}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_set_worker_graphs,
+                             initargs=(graphs,)) as pool:
+        futures = [(name, pool.submit(_betweenness_chunk, name, weight, chunk))
+                   for name, weight, chunk in tasks]
+        for name, future in futures:
+            totals[name] += future.result()
+    return totals
+
+
+_WORKER_GRAPHS = {}
+
+
+def _set_worker_graphs(graphs):
+    """Process pool initializer: keep the graphs of `_betweenness_sums`."""
+    _WORKER_GRAPHS.update(graphs)
+
 
+def _betweenness_chunk(name, weight, sources):
+    """Worker task: `_subset_betweenness` on a graph kept by the initializer."""
+    return _subset_betweenness(_WORKER_GRAPHS[name], weight, sources)
 
-def compute_bipartite_clustering(G, reporters=None, normalized=True):
+
+def _subset_betweenness(graph, weight, sources):
+    """Unnormalized betweenness accumulated over `sources`, in graph node order."""
+    if isinstance(graph, _CSRGraph):
+        return graph.betweenness(sources, weight)
+    nodes = list(graph)
+    partial = nx.betweenness_centrality_subset(graph, sources, nodes,
+                                               normalized=False, weight=weight)
+    return np.array([partial[node] for node in nodes])
+
+
+class _CSRGraph:
+    """
+    Undirected weighted graph as a symmetric sparse matrix, for the 'csr'
+    betweenness engine. Iterating over it yields the node labels.
+    """
+
+    def __init__(self, nodes, matrix):
+        self.nodes = list(nodes)
+        self.matrix = sp.csr_array(matrix)
+        self.matrix.sort_indices()
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def betweenness(self, sources, weight="weight"):
+        """
+        Unnormalized betweenness accumulated over `sources`, in node order.
+
+        Halved like `nx.betweenness_centrality_subset` on undirected graphs.
+        With a `_WeightTransform`, edges of non-positive weight are dropped
+        and the others get transformed lengths.
+        """
+        W = self.matrix
+        indptr, indices, lengths = W.indptr, W.indices, W.data
+        if isinstance(weight, _WeightTransform):
+            keep = lengths > 0
+            rows = np.repeat(np.arange(len(self.nodes)), np.diff(indptr))
+            counts = np.bincount(rows[keep], minlength=len(self.nodes))
+            indptr = np.concatenate([[0], np.cumsum(counts)])
+            indices = indices[keep]
+            lengths = weight.lengths(lengths[keep])
+        position = {node: i for i, node in enumerate(self.nodes)}
+        ids = [position[node] for node in sources]
+        return _brandes_csr(indptr.tolist(), indices.tolist(), lengths.tolist(),
+                            ids, len(self.nodes)) / 2
+
+
+def _brandes_csr(indptr, indices, lengths, sources, n):
+    """
+    Brandes' betweenness (sum of dependencies) over CSR lists of int ids.
+
+    Mirrors NetworkX's Dijkstra-based accumulation, including how equal
+    path lengths are detected, with list buffers reset after each source
+    instead of dicts rebuilt for it.
+    """
+    inf = math.inf
+    betweenness = [0.0] * n
+    sigma = [0.0] * n
+    delta = [0.0] * n
+    seen = [inf] * n
+    done = [False] * n
+    preds = [[] for _ in range(n)]
+
+    for s in sources:
+        order = []
+        sigma[s] = 1.0
+        seen[s] = 0.0
+        heap = [(0.0, 0, s, s)]
+        counter = 1
+        while heap:
+            dist, _, pred, v = heapq.heappop(heap)
+            if done[v]:
+                continue
+            sigma[v] += sigma[pred]
+            order.append(v)
+            done[v] = True
+            for j in range(indptr[v], indptr[v + 1]):
+                w = indices[j]
+                vw_dist = dist + lengths[j]
+                if not done[w] and vw_dist < seen[w]:
+                    seen[w] = vw_dist
+                    heapq.heappush(heap, (vw_dist, counter, v, w))
+                    counter += 1
+                    sigma[w] = 0.0
+                    preds[w] = [v]
+                elif vw_dist == seen[w]:
+                    sigma[w] += sigma[v]
+                    preds[w].append(v)
+
+        for w in reversed(order):
+            coeff = (1 + delta[w]) / sigma[w]
+            for v in preds[w]:
+                delta[v] += sigma[v] * coeff
+            if w != s:
+                betweenness[w] += delta[w]
+
+        for v in order:
+            sigma[v] = delta[v] = 0.0
+            seen[v] = inf
+            done[v] = False
+            preds[v] = []
+
+    return np.array(betweenness)
+
+
+def compute_bipartite_clustering(G, reporters=None, normalized=True, engine="sparse"):
     """
     Compute bipartite clustering coefficients C4b and C4b^w for each node in a bipartite graph.
 
     Parameters
     ----------
-    G : networkx.Graph
+    G : networkx.Graph or BipartiteTradeNetwork
         Bipartite graph with edge attribute 'weight'.
         reporters (set, optional): Set of nodes considered "Exportadores". 
                                    All others will be labeled "Importadores" if this is provided.
         normalized (bool): Whether to use normalized version of the clustering.
+        engine (str): 'sparse' (default) counts squares with sparse matrix
+                      products; 'python' enumerates neighbour pairs node by
+                      node. Both give the same values.
 
     Returns
     -------
     pd.DataFrame: 
         DataFrame with C4b, C4b^w, their ratio, degree and type.
     """
+    if engine == "sparse":
+        df = _c4b_sparse(G, normalized)
+    elif engine == "python":
+        if isinstance(G, BipartiteTradeNetwork):
+            G = G.to_graph()
+        df = _c4b_python(G, normalized)
+    else:
+        raise ValueError(f"engine must be 'sparse' or 'python', got {engine!r}")
+
+    df["C4_rate"] = df["C4b^w"] / df["C4b"]
+    df.replace([np.inf, -np.inf], np.nan, inplace=True)
+
+    if reporters is not None:
+        df["tipo"] = df["node"].apply(lambda x: "Exportador" if x in reporters else "Importador")
+
+    return df
+
+
+def _c4b_sparse(G, normalized=True):
+    """
+    C4b and C4b^w of every node from sparse matrix products.
+
+    With A the binary adjacency, W the weights, k the degrees and s the
+    strengths, C = A @ A counts the common neighbours of each pair and
+    P = A @ C. For node i, the squares through pairs of its neighbours are
+    q = (sum_m A_im P_im - (A k)_i) / 2 - k_i (k_i - 1) / 2, and their
+    weighted count is (sum_m W_im P_im - (W k)_i - (k_i - 1) s_i) / (2 s_i).
+    The number of second neighbours k_nn is the number of nonzeros in row i
+    of C, minus i itself.
+    """
+    nodes, _, W = _adjacency(G)
+    n = len(nodes)
+    A = sp.csr_array((np.ones(W.nnz, dtype=np.int64), W.indices, W.indptr), shape=W.shape)
+
+    k = np.diff(A.indptr)
+    s = np.asarray(W.sum(axis=1)).ravel()
+    C = A @ A
+    P = A @ C
+
+    q = (np.asarray(A.multiply(P).sum(axis=1)).ravel() - A @ k) // 2 - k * (k - 1) // 2
+    weighted = np.asarray(W.multiply(P).sum(axis=1)).ravel() - W @ k - (k - 1) * s
+    with np.errstate(divide="ignore", invalid="ignore"):
+        qw = np.where(s > 0, weighted / (2 * s), 0.0)
+
+    if normalized:
+        k_nn = np.diff(C.indptr) - (k > 0)
+        Q = k * (k - 1) / 2 * k_nn
+    else:
+        Q = np.ones(n)
+    valid = (k >= 2) & (Q > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c4b = np.where(valid, q / Q, 0.0)
+        c4bw = np.where(valid, qw / Q, 0.0)
+
+    return pd.DataFrame({
+        "node": nodes,
+        "C4b": c4b,
+        "C4b^w": c4bw,
+        # NetworkX counts self-loops twice in the degree
+        "degree": k + (A.diagonal() > 0),
+    })
+
+
+def _c4b_python(G, normalized=True):
+    """C4b and C4b^w of every node by enumerating neighbour pairs."""
 
     def c4b_node(G, node):
         neighbors = list(G[node])
@@ -212,11 +718,4 @@ def compute_bipartite_clustering(G, reporters=None, normalized=True):
             "degree": G.degree(node)
         })
 
-    df = pd.DataFrame(results)
-    df["C4_rate"] = df["C4b^w"] / df["C4b"]
-    df.replace([np.inf, -np.inf], np.nan, inplace=True)
-
-    if reporters is not None:
-        df["tipo"] = df["node"].apply(lambda x: "Exportador" if x in reporters else "Importador")
-
-    return df
\ No newline at end of file
+    return pd.DataFrame(results, columns=["node", "C4b", "C4b^w", "degree"])
\ No newline at end of file
@@ -1,9 +1,33 @@
+from collections.abc import Mapping
+
 import networkx as nx
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.special import betainc
+from scipy.stats import betabinom
+
+# Default FAOSTAT columns identifying reporter and partner countries
+REPORTER_PARTNER_CODES = ("Reporter Country Code (M49)", "Partner Country Code (M49)")
+REPORTER_PARTNER_NAMES = ("Reporter Countries", "Partner Countries")
+
+# Change types accepted in delta frames, in the order they are applied
+DELTA_CHANGES = ("delete", "update", "insert")
+
+# Largest strength for which the Pólya filter sums the exact beta-binomial
+# tail (O(s) per edge); above it the large-strength Beta limit is used
+_POLYA_EXACT_MAX_STRENGTH = 5000
 
-def build_bipartite_network(df, reporter_col, partner_col, weight_col):
+def build_bipartite_network(df, reporter_col, partner_col, weight_col, aggfunc="sum",
+                            index=None):
     """
     Construct a bipartite network from a FAOSTAT-style trade DataFrame.
 
+    Rows are first aggregated per (reporter, partner) pair with a single
+    group-by and the resulting edges are inserted in one bulk call, so
+    repeated pairs (e.g. several items or flags) are combined by `aggfunc`
+    instead of overwriting each other.
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -14,6 +38,15 @@ def build_bipartite_network(df, reporter_col, partner_col, weight_col):
         Column name for importer (partner) countries.
     weight_col : str
         Column name for trade volume or weight of the connection.
+    aggfunc : str or callable, optional
+        Reducer applied to the weights of duplicate pairs (default 'sum').
+        Any pandas aggregation works, e.g. 'mean', 'max' or 'last' (which
+        keeps the last row, as earlier versions did).
+    index : CountryIndex, optional
+        Shared country index. When given, `reporter_col` and `partner_col`
+        must hold its keys (e.g. the M49 code columns) and the nodes are the
+        dense integer ids of the index instead of labels, so graphs of
+        different years share one node numbering.
 
     Returns
     -------
@@ -24,18 +57,36 @@ def build_bipartite_network(df, reporter_col, partner_col, weight_col):
     partners : set
         Set of nodes representing importers (bipartite=1).
     """
+    flows = _aggregate_flows(df, reporter_col, partner_col, weight_col, aggfunc)
+    return _graph_from_flows(flows, index)
+
+
+def _graph_from_flows(flows, index=None):
+    """Build the bipartite graph of aggregated flows keyed by (reporter, partner)."""
     B = nx.Graph()
-    reporters = set(df[reporter_col])
-    partners = set(df[partner_col])
+    sources = flows.index.get_level_values(0)
+    targets = flows.index.get_level_values(1)
+    if index is not None:
+        sources = index.ids(sources)
+        targets = index.ids(targets)
+    reporters = set(sources.tolist())
+    partners = set(targets.tolist())
 
     B.add_nodes_from(reporters, bipartite=0)
     B.add_nodes_from(partners, bipartite=1)
 
-    for _, row in df.iterrows():
-        B.add_edge(row[reporter_col], row[partner_col], weight=row[weight_col])
+    B.add_weighted_edges_from(zip(sources.tolist(), targets.tolist(), flows.tolist()))
 
     return B, reporters, partners
 
+
+def _aggregate_flows(df, reporter_col, partner_col, weight_col, aggfunc="sum"):
+    """Reduce the weights of each (reporter, partner) pair, in order of appearance."""
+    grouped = df.groupby([reporter_col, partner_col], sort=False, dropna=False,
+                         observed=True)
+    return grouped[weight_col].agg(aggfunc)
+
+
 def remove_zero_weight_edges(G):
     """
     Remove all edges with zero weight from a NetworkX graph.
@@ -50,6 +101,1190 @@ def remove_zero_weight_edges(G):
     G : networkx.Graph
         The modified graph with zero-weight edges removed.
     """
-    zero_edges = [(u, v) for u, v, d in G.edges(data=True) if d.get("weight", 1) == 0]
-    G.remove_edges_from(zero_edges)
+    return prune_edges(G, zero=True)
+
+
+def prune_edges(G, zero=True, min_weight=None, min_share=None, quantile=None,
+                weight="weight"):
+    """
+    Remove weak edges from a trade network in a single vectorized pass.
+
+    All criteria are evaluated on the original weights and node strengths,
+    and an edge is removed if it fails any of the active ones.
+
+    Parameters
+    ----------
+    G : networkx.Graph or BipartiteTradeNetwork
+        Network to prune; modified in place.
+    zero : bool, optional
+        Remove edges with zero weight (default True).
+    min_weight : float, optional
+        Remove edges whose weight is below this absolute value.
+    min_share : float, optional
+        Remove edges whose weight is below this fraction of the strength of
+        both endpoints, i.e. keep an edge if it is at least `min_share` of
+        the total trade of its reporter or of its partner.
+    quantile : float, optional
+        Remove edges whose weight is below this global quantile of the edge
+        weights (between 0 and 1).
+    weight : str, optional
+        Edge attribute holding the weight on NetworkX graphs. Missing
+        weights count as 1.
+
+    Returns
+    -------
+    networkx.Graph or BipartiteTradeNetwork
+        The pruned network (the same object as `G`).
+    """
+    if isinstance(G, BipartiteTradeNetwork):
+        coo = G.matrix.tocoo()
+        n_reporters = G.shape[0]
+        keep = _prune_mask(coo.row, coo.col + n_reporters, coo.data, sum(G.shape),
+                           zero, min_weight, min_share, quantile)
+        G.matrix = sp.csr_array((coo.data[keep], (coo.row[keep], coo.col[keep])),
+                                shape=G.shape)
+        G._csc = None
+        return G
+
+    nodes, sources, targets, weights = _edge_arrays(G, weight)
+    keep = _prune_mask(sources, targets, weights, len(nodes), zero, min_weight,
+                       min_share, quantile)
+    drop = np.flatnonzero(~keep)
+    G.remove_edges_from([(nodes[sources[i]], nodes[targets[i]]) for i in drop])
     return G
+
+
+def edge_significance(G, method="disparity", a=1.0, weight="weight"):
+    """
+    Compute the backbone significance of every edge for both endpoints.
+
+    For each edge and endpoint, the p-value tests whether the edge carries
+    more of the endpoint's strength than expected if that strength were
+    spread at random over its k edges:
+
+    - 'disparity' (Serrano et al., 2009): p = (1 - w / s) ** (k - 1).
+    - 'polya' (Marcaccioli & Livan, 2019): p = P(X >= w) with X following a
+      beta-binomial distribution of s trials and parameters
+      (1 / a, (k - 1) / a). Weights are rounded to integers, as the test
+      counts units of trade. For strengths above 5000 the p-value uses the
+      large-s limit of the paper, P(Y >= w / s) with Y ~ Beta(1 / a,
+      (k - 1) / a), a regularized incomplete beta function that does not
+      depend on s. a = 1 then reduces to the disparity filter; larger `a`
+      is less strict, and a -> 0 approaches a binomial null.
+
+    Endpoints with a single edge get p = 1, since one edge cannot be judged
+    against others.
+
+    Parameters
+    ----------
+    G : networkx.Graph or BipartiteTradeNetwork
+        Bipartite trade network.
+    method : {'disparity', 'polya'}, optional
+        Null model used for the test.
+    a : float, optional
+        Pólya urn parameter, used only with method='polya'.
+    weight : str, optional
+        Edge attribute holding the weight on NetworkX graphs.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per edge with columns ['reporter', 'partner', 'weight',
+        'pvalue_reporter', 'pvalue_partner'].
+    """
+    if isinstance(G, BipartiteTradeNetwork):
+        coo = G.matrix.tocoo()
+        n_reporters = G.shape[0]
+        sources, targets, weights = coo.row, coo.col + n_reporters, coo.data
+        labels = np.concatenate([G.reporters, G.partners])
+        n_nodes = len(labels)
+    else:
+        nodes, sources, targets, weights = _edge_arrays(G, weight)
+        # Orient edges as reporter -> partner
+        side = np.array([G.nodes[n].get("bipartite", 0) for n in nodes])
+        swap = side[sources] == 1
+        sources, targets = np.where(swap, targets, sources), np.where(swap, sources, targets)
+        labels = np.asarray(nodes, dtype=object)
+        n_nodes = len(nodes)
+
+    pvalue_source, pvalue_target = _edge_pvalues(sources, targets, weights, n_nodes,
+                                                 method, a)
+    return pd.DataFrame({
+        "reporter": labels[sources],
+        "partner": labels[targets],
+        "weight": weights,
+        "pvalue_reporter": pvalue_source,
+        "pvalue_partner": pvalue_target,
+    })
+
+
+def extract_backbone(G, alpha=0.05, method="disparity", a=1.0, rule="either",
+                     weight="weight"):
+    """
+    Keep only the statistically significant edges of a trade network.
+
+    Unlike `filter_top_percentile`, which keeps the globally largest flows,
+    the backbone keeps the flows that are large for the countries involved,
+    so small countries keep their main partners. Applying it before
+    betweenness or clustering also shrinks the graphs those metrics run on.
+
+    Parameters
+    ----------
+    G : networkx.Graph or BipartiteTradeNetwork
+        Network to filter; modified in place.
+    alpha : float, optional
+        Significance level (default 0.05).
+    method : {'disparity', 'polya'}, optional
+        Null model, see `edge_significance`.
+    a : float, optional
+        Pólya urn parameter, used only with method='polya'.
+    rule : {'either', 'both'}, optional
+        Keep an edge if it is significant for at least one endpoint (the
+        usual choice) or for both.
+    weight : str, optional
+        Edge attribute holding the weight on NetworkX graphs.
+
+    Returns
+    -------
+    networkx.Graph or BipartiteTradeNetwork
+        The filtered network (the same object as `G`).
+    """
+    if rule not in ("either", "both"):
+        raise ValueError(f"rule must be 'either' or 'both', got {rule!r}")
+    combine = np.logical_or if rule == "either" else np.logical_and
+
+    if isinstance(G, BipartiteTradeNetwork):
+        coo = G.matrix.tocoo()
+        n_reporters = G.shape[0]
+        p_source, p_target = _edge_pvalues(coo.row, coo.col + n_reporters, coo.data,
+                                           sum(G.shape), method, a)
+        keep = combine(p_source < alpha, p_target < alpha)
+        G.matrix = sp.csr_array((coo.data[keep], (coo.row[keep], coo.col[keep])),
+                                shape=G.shape)
+        G._csc = None
+        return G
+
+    nodes, sources, targets, weights = _edge_arrays(G, weight)
+    p_source, p_target = _edge_pvalues(sources, targets, weights, len(nodes), method, a)
+    drop = np.flatnonzero(~combine(p_source < alpha, p_target < alpha))
+    G.remove_edges_from([(nodes[sources[i]], nodes[targets[i]]) for i in drop])
+    return G
+
+
+def weighted_projection(G, side=0, method="count", weight="weight"):
+    """
+    Project a bipartite trade network onto one group of countries.
+
+    The projection is computed from the sparse adjacency matrix instead of
+    building a NetworkX graph: with A the binary adjacency and W the weights,
+    two countries of the group are linked when they share a neighbour, with
+
+    - 'count': the number of shared neighbours, (A A)_uv, as in
+      `bipartite.weighted_projected_graph`;
+    - 'product': the sum of weight products over shared neighbours, (W W)_uv;
+    - 'min': the sum over shared neighbours of the smaller of the two weights.
+
+    As in `bipartite.weighted_projected_graph`, a node outside the group is
+    also included when it shares a neighbour with a node of the group, which
+    only happens if the graph is not strictly bipartite.
+
+    Parameters
+    ----------
+    G : networkx.Graph or BipartiteTradeNetwork
+        Bipartite network.
+    side : {0, 1}, optional
+        Group to project onto: 0 for the nodes with 'bipartite' attribute 0
+        (reporters), 1 for all the others (partners).
+    method : {'count', 'product', 'min'}, optional
+        Weight of the projected links, see above.
+    weight : str, optional
+        Edge attribute holding the weight on NetworkX graphs.
+
+    Returns
+    -------
+    nodes : list
+        Node labels of the projection.
+    P : scipy.sparse.csr_array
+        Symmetric projected adjacency matrix, aligned with `nodes`, with an
+        empty diagonal. Every stored entry is a link, even if its weight is 0.
+    """
+    if side not in (0, 1):
+        raise ValueError(f"side must be 0 or 1, got {side!r}")
+    nodes, groups, W = _adjacency(G, weight)
+    in_group = (groups == 0) if side == 0 else (groups != 0)
+
+    if method not in ("count", "product", "min"):
+        raise ValueError(f"method must be 'count', 'product' or 'min', got {method!r}")
+
+    # Links are the nonzeros of A A restricted to group rows; the weighted
+    # methods read their values at those positions, so a link whose weighted
+    # value is 0 is kept
+    A = sp.csr_array((np.ones(W.nnz), W.indices, W.indptr), shape=W.shape)
+    select = sp.csr_array((in_group.astype(float), (np.arange(len(nodes)),) * 2),
+                          shape=W.shape)
+    M = (select @ A @ A).tocoo()
+    rows, cols, values = M.row, M.col, M.data
+    if method == "product":
+        values = (select @ W @ W).tocsr()[rows, cols]
+    elif method == "min":
+        values = _min_projection(W, in_group)[rows, cols]
+
+    off_diagonal = rows != cols
+    rows, cols, values = rows[off_diagonal], cols[off_diagonal], values[off_diagonal]
+    # Links from a group node to an outside node are only found from the group side
+    outside = ~in_group[cols]
+    rows, cols = (np.concatenate([rows, cols[outside]]),
+                  np.concatenate([cols, rows[outside]]))
+    values = np.concatenate([values, values[outside]])
+
+    keep = in_group.copy()
+    keep[cols] = True
+    ids = np.full(len(nodes), -1)
+    ids[keep] = np.arange(keep.sum())
+    n = int(keep.sum())
+    P = sp.csr_array((values, (ids[rows], ids[cols])), shape=(n, n))
+    return [node for node, kept in zip(nodes, keep) if kept], P
+
+
+def _min_projection(W, in_group, max_pairs=2 ** 20):
+    """
+    Sum over shared neighbours of min(w_um, w_vm), for u in the group.
+
+    Pairs are enumerated per middle node m, only from its neighbours u in the
+    group (so in a bipartite graph only middle nodes of the other side
+    contribute) and skipping u == v. Middle nodes are processed in blocks of
+    at most about `max_pairs` pairs to bound memory.
+    """
+    n = W.shape[0]
+    degree = np.diff(W.indptr)
+    row_of = np.repeat(np.arange(n), degree)
+    group_positions = np.flatnonzero(in_group[W.indices])
+    group_degree = np.bincount(row_of[group_positions], minlength=n)
+    group_start = np.cumsum(group_degree) - group_degree
+    pairs = group_degree * degree
+
+    result = sp.csr_array((n, n))
+    total = np.concatenate([[0], np.cumsum(pairs)])
+    start = 0
+    while start < n:
+        end = np.searchsorted(total, total[start] + max_pairs, side="right") - 1
+        end = min(max(end, start + 1), n)
+        middles = np.arange(start, end)
+        start = end
+        counts = pairs[middles]
+        if not counts.sum():
+            continue
+        middle = np.repeat(middles, counts)
+        position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        first = group_positions[group_start[middle] + position // degree[middle]]
+        second = W.indptr[middle] + position % degree[middle]
+        distinct = first != second
+        first, second = first[distinct], second[distinct]
+        values = np.minimum(W.data[first], W.data[second])
+        result = result + sp.csr_array((values, (W.indices[first], W.indices[second])),
+                                       shape=(n, n))
+    return result
+
+
+def _edge_pvalues(sources, targets, weights, n_nodes, method="disparity", a=1.0):
+    """Backbone p-values of each edge for its source and its target node."""
+    if method == "polya":
+        if a <= 0:
+            raise ValueError(f"Pólya parameter a must be positive, got {a!r}")
+        weights = np.rint(weights)
+    elif method != "disparity":
+        raise ValueError(f"method must be 'disparity' or 'polya', got {method!r}")
+
+    degree = (np.bincount(sources, minlength=n_nodes)
+              + np.bincount(targets, minlength=n_nodes))
+    strength = (np.bincount(sources, weights, minlength=n_nodes)
+                + np.bincount(targets, weights, minlength=n_nodes))
+
+    pvalues = []
+    for ends in (sources, targets):
+        k, s = degree[ends], strength[ends]
+        p = np.ones(len(weights))
+        test = (k > 1) & (s > 0)
+        if method == "disparity":
+            p[test] = (1 - weights[test] / s[test]) ** (k[test] - 1)
+        else:
+            p[test] = _polya_pvalues(weights[test], s[test], k[test], a)
+        pvalues.append(p)
+    return pvalues
+
+
+def _polya_pvalues(weights, strength, degree, a):
+    """P(X >= w) under the Pólya urn null BetaBinomial(s, 1 / a, (k - 1) / a)."""
+    alpha, beta = 1 / a, (degree - 1) / a
+    p = np.empty(len(weights))
+    exact = strength <= _POLYA_EXACT_MAX_STRENGTH
+    p[exact] = betabinom.sf(weights[exact] - 1, strength[exact], alpha, beta[exact])
+    large = ~exact
+    # X / s tends to Beta(alpha, beta), and P(Y >= x) = I_{1 - x}(beta, alpha)
+    share = np.clip(weights[large] / strength[large], 0, 1)
+    p[large] = betainc(beta[large], alpha, 1 - share)
+    return p
+
+
+def _edge_arrays(G, weight="weight"):
+    """Return (nodes, source ids, target ids, weights) arrays for the edges of `G`."""
+    nodes = list(G)
+    position = {node: i for i, node in enumerate(nodes)}
+    edges = G.edges(data=weight, default=1)
+    sources = np.fromiter((position[u] for u, _, _ in edges), dtype=np.int64,
+                          count=G.number_of_edges())
+    targets = np.fromiter((position[v] for _, v, _ in edges), dtype=np.int64,
+                          count=G.number_of_edges())
+    weights = np.fromiter((w for _, _, w in edges), dtype=float,
+                          count=G.number_of_edges())
+    return nodes, sources, targets, weights
+
+
+def _adjacency(G, weight="weight"):
+    """
+    Symmetric weighted adjacency matrix of a network, in NetworkX node terms.
+
+    Works on graphs and on `BipartiteTradeNetwork` objects, whose labels are
+    merged exactly as `to_graph` would merge them (a label present in both
+    groups is one node, and the last flow between two nodes wins).
+
+    Returns
+    -------
+    nodes : list
+        Node labels, in graph order.
+    side : np.ndarray
+        The 'bipartite' attribute of each node (None if missing).
+    W : scipy.sparse.csr_array
+        Adjacency matrix with the edge weights; zero-weight edges are stored
+        as explicit zeros so the sparsity pattern is the edge set.
+    """
+    if isinstance(G, BipartiteTradeNetwork):
+        coo = G.matrix.tocoo()
+        reporters, partners = G.reporters, G.partners
+        row_ids = np.arange(len(reporters))
+        col_ids = np.arange(len(partners))
+        if G.index is not None:
+            row_ids = row_ids[np.diff(G.matrix.indptr) > 0]
+            col_ids = col_ids[np.diff(G.csc.indptr) > 0]
+        codes, labels = pd.factorize(np.concatenate([reporters[row_ids], partners[col_ids]]))
+        row_codes = np.full(len(reporters), -1)
+        col_codes = np.full(len(partners), -1)
+        row_codes[row_ids] = codes[:len(row_ids)]
+        col_codes[col_ids] = codes[len(row_ids):]
+
+        nodes = labels.tolist()
+        side = np.zeros(len(nodes), dtype=object)
+        side[col_codes[col_ids]] = 1
+        sources, targets, weights = row_codes[coo.row], col_codes[coo.col], coo.data
+
+        # Keep the last flow of each unordered pair, as repeated edges do in NetworkX
+        n = len(nodes)
+        pair = np.minimum(sources, targets) * n + np.maximum(sources, targets)
+        _, last = np.unique(pair[::-1], return_index=True)
+        keep = np.sort(len(pair) - 1 - last)
+        sources, targets, weights = sources[keep], targets[keep], weights[keep]
+    else:
+        nodes, sources, targets, weights = _edge_arrays(G, weight)
+        side = np.array([G.nodes[node].get("bipartite") for node in nodes], dtype=object)
+
+    n = len(nodes)
+    loops = sources == targets
+    W = sp.csr_array(
+        (np.concatenate([weights, weights[~loops]]),
+         (np.concatenate([sources, targets[~loops]]),
+          np.concatenate([targets, sources[~loops]]))),
+        shape=(n, n),
+    )
+    return nodes, side, W
+
+
+def _prune_mask(sources, targets, weights, n_nodes, zero=True, min_weight=None,
+                min_share=None, quantile=None):
+    """Boolean mask of the edges kept by `prune_edges`."""
+    keep = np.ones(len(weights), dtype=bool)
+    if zero:
+        keep &= weights != 0
+    if min_weight is not None:
+        keep &= weights >= min_weight
+    if min_share is not None:
+        strength = (np.bincount(sources, weights, minlength=n_nodes)
+                    + np.bincount(targets, weights, minlength=n_nodes))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.maximum(weights / strength[sources], weights / strength[targets])
+        keep &= share >= min_share
+    if quantile is not None and len(weights):
+        keep &= weights >= np.quantile(weights, quantile)
+    return keep
+
+
+def apply_trade_delta(B, delta, reporter_col, partner_col, weight_col,
+                      change_col="Change", index=None):
+    """
+    Apply revised or appended trade rows to a bipartite graph in place.
+
+    Each row of `delta` describes one change of a (reporter, partner) flow:
+
+    - 'insert': add the weight to the flow, creating it if needed. This
+      matches the default summing of `build_bipartite_network`.
+    - 'update': replace the weight of the flow.
+    - 'delete': remove the flow.
+
+    Deletions are applied first, then updates, then insertions. Countries
+    left without any flow are removed, so the result is the graph that a
+    rebuild from the revised data would give.
+
+    Parameters
+    ----------
+    B : networkx.Graph
+        Graph returned by `build_bipartite_network`; modified in place.
+    delta : pd.DataFrame
+        Changed flows, with the reporter, partner, weight and change columns.
+        The weight is ignored for deletions.
+    reporter_col : str
+        Column name for exporter (reporter) countries.
+    partner_col : str
+        Column name for importer (partner) countries.
+    weight_col : str
+        Column name for trade volume or weight of the connection.
+    change_col : str, optional
+        Column holding 'insert', 'update' or 'delete' (default 'Change').
+    index : CountryIndex, optional
+        Country index used to build `B`, if any.
+
+    Returns
+    -------
+    set
+        Nodes whose flows changed, including removed nodes. Metrics of other
+        nodes' flows are unaffected, although path-based metrics can still
+        change elsewhere.
+    """
+    changes = _delta_changes(delta, reporter_col, partner_col, weight_col,
+                             change_col, index)
+    touched = set()
+    for change, flows in changes.items():
+        sources = flows.index.get_level_values(0).tolist()
+        targets = flows.index.get_level_values(1).tolist()
+        touched.update(sources)
+        touched.update(targets)
+
+        if change == "delete":
+            B.remove_edges_from([(u, v) for u, v in zip(sources, targets)
+                                 if B.has_edge(u, v)])
+            continue
+
+        B.add_nodes_from([u for u in sources if u not in B], bipartite=0)
+        B.add_nodes_from([v for v in targets if v not in B], bipartite=1)
+        weights = flows.tolist()
+        if change == "insert":
+            weights = [w + (B[u][v].get("weight", 0) if B.has_edge(u, v) else 0)
+                       for u, v, w in zip(sources, targets, weights)]
+        B.add_weighted_edges_from(zip(sources, targets, weights))
+
+    B.remove_nodes_from([n for n in touched if n in B and B.degree(n) == 0])
+    return touched
+
+
+def _delta_changes(delta, reporter_col, partner_col, weight_col, change_col,
+                   index=None):
+    """Group a delta frame into one flow Series per change type, keyed by node."""
+    kinds = delta[change_col].astype(str).str.lower().to_numpy()
+    unknown = set(kinds) - set(DELTA_CHANGES)
+    if unknown:
+        raise ValueError(f"Unknown change types {sorted(unknown)}; expected {DELTA_CHANGES}")
+
+    changes = {}
+    for change in DELTA_CHANGES:
+        rows = delta[kinds == change]
+        if not len(rows):
+            continue
+        aggfunc = "sum" if change == "insert" else "last"
+        flows = _aggregate_flows(rows, reporter_col, partner_col, weight_col, aggfunc)
+        if index is not None:
+            flows.index = pd.MultiIndex.from_arrays([
+                index.ids(flows.index.get_level_values(0)),
+                index.ids(flows.index.get_level_values(1)),
+            ])
+        flows.index = flows.index.set_names(["reporter", "partner"])
+        changes[change] = flows
+    return changes
+
+
+class CountryIndex:
+    """
+    Shared mapping from country keys (e.g. M49 codes) to dense integer ids.
+
+    Ids follow the order in which keys are first added and never change, so
+    networks of different years built with the same index share one node
+    numbering and their metric arrays line up position by position. Build
+    the index from the whole panel before building the yearly networks, or
+    keep updating it as new years arrive and save it with `save`.
+
+    Parameters
+    ----------
+    keys : array-like, optional
+        Initial keys.
+    names : array-like, optional
+        Display names of `keys`. Defaults to the keys themselves.
+    """
+
+    def __init__(self, keys=(), names=None):
+        self._keys = pd.Index([])
+        self._names = np.array([], dtype=object)
+        self.add(keys, names)
+
+    @classmethod
+    def from_frame(cls, df, key_cols=REPORTER_PARTNER_CODES,
+                   name_cols=REPORTER_PARTNER_NAMES):
+        """
+        Build an index from the reporter and partner columns of a trade frame.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            FAOSTAT-style trade data.
+        key_cols : tuple of str, optional
+            Columns holding the keys (default: reporter and partner M49 codes).
+        name_cols : tuple of str or None, optional
+            Columns holding the names matching `key_cols`, or None to use the
+            keys as names.
+
+        Returns
+        -------
+        CountryIndex
+        """
+        return cls().update(df, key_cols, name_cols)
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Load an index saved with `save`.
+
+        Keys come back with the dtype recorded in the file, so string codes
+        such as '004' are not turned into numbers. Files without the
+        'key_dtype' column, written by older versions, get inferred types.
+        """
+        table = pd.read_csv(filepath, dtype=str, keep_default_na=False)
+        table["id"] = table["id"].astype(np.int64)
+        table = table.sort_values("id")
+        if "key_dtype" not in table:
+            keys = pd.read_csv(filepath).sort_values("id")["key"]
+        elif len(table) and table["key_dtype"].iloc[0] != "str":
+            keys = table["key"].astype(table["key_dtype"].iloc[0])
+        else:
+            keys = table["key"].astype(object)
+        return cls(keys.to_numpy(), table["name"].to_numpy(dtype=object))
+
+    def save(self, filepath):
+        """
+        Save the index to a CSV file with columns ['id', 'key', 'name',
+        'key_dtype'], the last one recording the key type for `load`.
+        """
+        frame = self.to_frame()
+        dtype = self._keys.dtype
+        numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        frame["key_dtype"] = dtype.name if numeric else "str"
+        frame.to_csv(filepath, index=False)
+
+    def update(self, df, key_cols=REPORTER_PARTNER_CODES,
+               name_cols=REPORTER_PARTNER_NAMES):
+        """
+        Add the countries of a trade frame (e.g. a new year) to the index.
+
+        Returns
+        -------
+        CountryIndex
+            The index itself, to allow chaining.
+        """
+        for i, key_col in enumerate(key_cols):
+            names = None if name_cols is None else df[name_cols[i]]
+            self.add(df[key_col], names)
+        return self
+
+    def add(self, keys, names=None):
+        """
+        Add keys that are not in the index yet.
+
+        Parameters
+        ----------
+        keys : array-like
+            Keys to add. Known keys keep their id.
+        names : array-like, optional
+            Display names of `keys`. Defaults to the keys themselves.
+
+        Returns
+        -------
+        CountryIndex
+            The index itself, to allow chaining.
+        """
+        keys = np.asarray(keys)
+        names = keys if names is None else np.asarray(names)
+        table = pd.DataFrame({"key": keys, "name": names}).drop_duplicates("key")
+        table = table[~table["key"].isin(self._keys)]
+        if len(table):
+            new_keys = pd.Index(table["key"])
+            self._keys = new_keys if len(self._keys) == 0 else self._keys.append(new_keys)
+            self._names = np.concatenate([self._names, table["name"].to_numpy(dtype=object)])
+        return self
+
+    def ids(self, keys):
+        """
+        Return the integer ids of `keys`.
+
+        Raises
+        ------
+        KeyError
+            If any key is not in the index.
+        """
+        ids = self._keys.get_indexer(np.asarray(keys))
+        if (ids < 0).any():
+            missing = pd.unique(np.asarray(keys)[ids < 0])
+            raise KeyError(f"Keys not in the country index: {list(missing)[:10]}")
+        return ids
+
+    @property
+    def keys(self):
+        """Array of keys; position i holds the key of id i."""
+        return self._keys.to_numpy()
+
+    @property
+    def names(self):
+        """Array of names; position i holds the name of id i."""
+        return self._names
+
+    def to_frame(self):
+        """Return the index as a DataFrame with columns ['id', 'key', 'name']."""
+        return pd.DataFrame({"id": np.arange(len(self)), "key": self.keys, "name": self.names})
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __repr__(self):
+        return f"CountryIndex(countries={len(self)})"
+
+
+class BipartiteTradeNetwork:
+    """
+    Bipartite trade network stored as a sparse biadjacency matrix.
+
+    Rows are reporters (exporters, bipartite=0) and columns are partners
+    (importers, bipartite=1); entry (i, j) is the weight of the flow from
+    `reporters[i]` to `partners[j]`. Stored entries are the edges, so flows
+    with zero weight are kept as explicit zeros, as in the NetworkX graph.
+
+    Parameters
+    ----------
+    matrix : scipy.sparse array or matrix
+        Biadjacency matrix of shape (len(reporters), len(partners)).
+    reporters : array-like
+        Reporter labels, one per row.
+    partners : array-like
+        Partner labels, one per column.
+    index : CountryIndex, optional
+        Shared country index the rows and columns are aligned to. Set by
+        `from_frame` when it is given an index.
+    """
+
+    def __init__(self, matrix, reporters, partners, index=None):
+        self.matrix = sp.csr_array(matrix)
+        self.reporters = np.asarray(reporters, dtype=object)
+        self.partners = np.asarray(partners, dtype=object)
+        if self.matrix.shape != (len(self.reporters), len(self.partners)):
+            raise ValueError(
+                f"Matrix shape {self.matrix.shape} does not match "
+                f"{len(self.reporters)} reporters and {len(self.partners)} partners"
+            )
+        self.index = index
+        self._csc = None
+
+    @classmethod
+    def from_frame(cls, df, reporter_col, partner_col, weight_col, aggfunc="sum",
+                   index=None):
+        """
+        Build the network from a FAOSTAT-style trade DataFrame.
+
+        Takes the same arguments as `build_bipartite_network`; duplicate
+        (reporter, partner) pairs are combined with `aggfunc`.
+
+        Returns
+        -------
+        BipartiteTradeNetwork
+            Network with reporters and partners in order of first appearance.
+            With `index`, the matrix is square over all countries of the
+            index and both label arrays hold the integer ids, so networks of
+            different years built with the same index are aligned.
+        """
+        flows = _aggregate_flows(df, reporter_col, partner_col, weight_col, aggfunc)
+        sources = flows.index.get_level_values(0)
+        targets = flows.index.get_level_values(1)
+        if index is None:
+            rows, reporters = pd.factorize(sources, use_na_sentinel=False)
+            cols, partners = pd.factorize(targets, use_na_sentinel=False)
+        else:
+            rows, cols = index.ids(sources), index.ids(targets)
+            reporters = partners = np.arange(len(index))
+        matrix = sp.csr_array(
+            (flows.to_numpy(dtype=float), (rows, cols)),
+            shape=(len(reporters), len(partners)),
+        )
+        return cls(matrix, reporters, partners, index=index)
+
+    @classmethod
+    def from_graph(cls, G, weight="weight"):
+        """
+        Build the network from a bipartite NetworkX graph.
+
+        Nodes with attribute bipartite=0 become reporters and all other
+        nodes partners, as in `compute_betweenness_all`. Edges between two
+        nodes of the same group are ignored.
+
+        Parameters
+        ----------
+        G : networkx.Graph
+            Bipartite graph, e.g. from `build_bipartite_network`.
+        weight : str, optional
+            Edge attribute holding the weight. Missing weights count as 1.
+
+        Returns
+        -------
+        BipartiteTradeNetwork
+            Network with reporters and partners in graph node order.
+        """
+        reporters = [n for n, d in G.nodes(data=True) if d.get("bipartite") == 0]
+        reporter_set = set(reporters)
+        partners = [n for n in G if n not in reporter_set]
+        matrix = nx.bipartite.biadjacency_matrix(
+            G, row_order=reporters, column_order=partners, weight=weight,
+            dtype=float, format="csr",
+        )
+        return cls(matrix, reporters, partners)
+
+    def to_graph(self, weight="weight"):
+        """
+        Convert the network to a bipartite NetworkX graph.
+
+        The graph has the same layout as the one returned by
+        `build_bipartite_network`; a label present in both groups becomes a
+        single node. For networks aligned to a `CountryIndex`, countries
+        without flows are left out, as they are absent from the trade data.
+
+        Parameters
+        ----------
+        weight : str, optional
+            Edge attribute used to store the weights.
+
+        Returns
+        -------
+        networkx.Graph
+            Bipartite graph with bipartite=0 for reporters and 1 for partners.
+        """
+        B = nx.Graph()
+        reporters, partners = self.reporters, self.partners
+        if self.index is not None:
+            reporters = reporters[np.diff(self.matrix.indptr) > 0]
+            partners = partners[np.diff(self.csc.indptr) > 0]
+        B.add_nodes_from(reporters.tolist(), bipartite=0)
+        B.add_nodes_from(partners.tolist(), bipartite=1)
+
+        coo = self.matrix.tocoo()
+        B.add_weighted_edges_from(zip(
+            self.reporters[coo.row].tolist(),
+            self.partners[coo.col].tolist(),
+            coo.data.tolist(),
+        ), weight=weight)
+        return B
+
+    def apply_delta(self, delta, reporter_col, partner_col, weight_col,
+                    change_col="Change"):
+        """
+        Apply revised or appended trade rows to the network in place.
+
+        Uses the same delta format and rules as `apply_trade_delta`. Without a
+        country index, countries left without flows are dropped and new ones
+        are appended; with an index, new countries must be added to the index
+        first and the matrix grows to the size of the index.
+
+        Returns
+        -------
+        set
+            Labels (or index ids) of the countries whose flows changed.
+        """
+        changes = _delta_changes(delta, reporter_col, partner_col, weight_col,
+                                 change_col, self.index)
+        coo = self.matrix.tocoo()
+        flows = pd.Series(coo.data, index=pd.MultiIndex.from_arrays(
+            [self.reporters[coo.row], self.partners[coo.col]],
+            names=["reporter", "partner"]))
+
+        touched = set()
+        for change, delta_flows in changes.items():
+            touched.update(delta_flows.index.get_level_values(0).tolist())
+            touched.update(delta_flows.index.get_level_values(1).tolist())
+            if change == "insert":
+                flows = flows.add(delta_flows, fill_value=0)
+            else:
+                flows = flows.drop(delta_flows.index, errors="ignore")
+                if change == "update":
+                    flows = pd.concat([flows, delta_flows])
+
+        sources = flows.index.get_level_values(0)
+        targets = flows.index.get_level_values(1)
+        if self.index is None:
+            rows, reporters = pd.factorize(sources, use_na_sentinel=False)
+            cols, partners = pd.factorize(targets, use_na_sentinel=False)
+        else:
+            rows, cols = sources.to_numpy(dtype=np.int64), targets.to_numpy(dtype=np.int64)
+            reporters = partners = np.arange(len(self.index))
+        self.matrix = sp.csr_array((flows.to_numpy(dtype=float), (rows, cols)),
+                                   shape=(len(reporters), len(partners)))
+        self.reporters = np.asarray(reporters, dtype=object)
+        self.partners = np.asarray(partners, dtype=object)
+        self._csc = None
+        return touched
+
+    def degree(self, side=0):
+        """
+        Number of edges of every reporter (side 0) or partner (side 1).
+
+        Returns
+        -------
+        np.ndarray
+            Degrees aligned with `reporters` or `partners`.
+        """
+        matrix = self.matrix if side == 0 else self.csc
+        return np.diff(matrix.indptr)
+
+    def strength(self, side=0):
+        """
+        Sum of edge weights of every reporter (side 0) or partner (side 1).
+
+        Returns
+        -------
+        np.ndarray
+            Strengths aligned with `reporters` or `partners`.
+        """
+        return np.asarray(self.matrix.sum(axis=1 - side)).ravel()
+
+    @property
+    def csc(self):
+        """Biadjacency matrix in CSC format, for fast access by partner."""
+        if self._csc is None:
+            self._csc = self.matrix.tocsc()
+        return self._csc
+
+    @property
+    def shape(self):
+        """Tuple (number of reporters, number of partners)."""
+        return self.matrix.shape
+
+    @property
+    def nnz(self):
+        """Number of edges (stored entries, including zero-weight flows)."""
+        return self.matrix.nnz
+
+    def __repr__(self):
+        return (f"BipartiteTradeNetwork(reporters={len(self.reporters)}, "
+                f"partners={len(self.partners)}, edges={self.nnz})")
+
+
+def build_item_networks(df, reporter_col, partner_col, weight_col, item_col="Item",
+                        year_col=None, aggfunc="sum", index=None):
+    """
+    Build one bipartite network per item (or per item and year) in one pass.
+
+    The whole frame is aggregated with a single group-by over item, year,
+    reporter and partner, and the flows are stored once as shared code
+    arrays sorted by group. The networks themselves are only built when a
+    key of the returned collection is accessed, which replaces filtering
+    the frame and calling `build_bipartite_network` once per item.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The input data containing trade flows for many items.
+    reporter_col : str
+        Column name for exporter (reporter) countries.
+    partner_col : str
+        Column name for importer (partner) countries.
+    weight_col : str
+        Column name for trade volume or weight of the connection.
+    item_col : str, optional
+        Column identifying the commodity (default 'Item').
+    year_col : str, optional
+        If given (e.g. 'Year'), build one network per (item, year) pair.
+    aggfunc : str or callable, optional
+        Reducer applied to duplicate (reporter, partner) pairs of a group.
+    index : CountryIndex, optional
+        Shared country index; all networks are then aligned to it (see
+        `BipartiteTradeNetwork.from_frame`).
+
+    Returns
+    -------
+    NetworkCollection
+        Mapping from item (or (item, year) tuple) to `BipartiteTradeNetwork`.
+    """
+    group_cols = [item_col] if year_col is None else [item_col, year_col]
+    grouped = df.groupby(group_cols + [reporter_col, partner_col], sort=False,
+                         dropna=False, observed=True)
+    flows = grouped[weight_col].agg(aggfunc)
+
+    groups = flows.index.droplevel([reporter_col, partner_col])
+    group_codes, keys = pd.factorize(groups, use_na_sentinel=False)
+    sources = flows.index.get_level_values(reporter_col)
+    targets = flows.index.get_level_values(partner_col)
+    if index is None:
+        rows, reporters = pd.factorize(sources, use_na_sentinel=False)
+        cols, partners = pd.factorize(targets, use_na_sentinel=False)
+    else:
+        rows, cols = index.ids(sources), index.ids(targets)
+        reporters = partners = np.arange(len(index))
+
+    order = np.argsort(group_codes, kind="stable")
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(group_codes, minlength=len(keys)), out=offsets[1:])
+
+    return NetworkCollection(
+        keys=keys.tolist(), offsets=offsets, rows=rows[order], cols=cols[order],
+        weights=flows.to_numpy(dtype=float)[order], reporters=reporters,
+        partners=partners, index=index,
+    )
+
+
+class NetworkCollection(Mapping):
+    """
+    Lazily built networks sharing one set of flow arrays.
+
+    Returned by `build_item_networks`. Flows are stored once, sorted by
+    group, and `collection[key]` builds the `BipartiteTradeNetwork` of that
+    group from its slice. Networks are not cached; keep a reference to the
+    ones you reuse.
+    """
+
+    def __init__(self, keys, offsets, rows, cols, weights, reporters, partners,
+                 index=None):
+        self._positions = {key: i for i, key in enumerate(keys)}
+        self._offsets = offsets
+        self._rows = rows
+        self._cols = cols
+        self._weights = weights
+        self._reporters = np.asarray(reporters, dtype=object)
+        self._partners = np.asarray(partners, dtype=object)
+        self.index = index
+
+    def __getitem__(self, key):
+        i = self._positions[key]
+        start, stop = self._offsets[i], self._offsets[i + 1]
+        rows = self._rows[start:stop]
+        cols = self._cols[start:stop]
+        weights = self._weights[start:stop]
+
+        return _network_from_codes(rows, cols, weights, self._reporters,
+                                   self._partners, self.index)
+
+    def graph(self, key):
+        """Return the network of `key` as a NetworkX graph (see `to_graph`)."""
+        return self[key].to_graph()
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __repr__(self):
+        return f"NetworkCollection(networks={len(self)}, edges={len(self._weights)})"
+
+
+class MultilayerTradeNetwork:
+    """
+    Multilayer trade network: reporters x partners x layers (e.g. items).
+
+    All layers share the same reporter and partner label arrays and are
+    stacked vertically in one CSR matrix of shape
+    (n_layers * n_reporters, n_partners), so a layer is a row slice,
+    aggregating layers is a sum of slices and per-layer degrees and
+    strengths come from a couple of sparse products.
+
+    Parameters
+    ----------
+    matrix : scipy.sparse array or matrix
+        Stacked biadjacency matrix; block l holds the layer `layers[l]`.
+    layers : list
+        Layer keys, in block order.
+    reporters : array-like
+        Reporter labels shared by all layers.
+    partners : array-like
+        Partner labels shared by all layers.
+    index : CountryIndex, optional
+        Shared country index the labels come from, if any.
+    """
+
+    def __init__(self, matrix, layers, reporters, partners, index=None):
+        self.matrix = sp.csr_array(matrix)
+        self.layers = list(layers)
+        self.reporters = np.asarray(reporters, dtype=object)
+        self.partners = np.asarray(partners, dtype=object)
+        self.index = index
+        self._positions = {key: i for i, key in enumerate(self.layers)}
+        expected = (len(self.layers) * len(self.reporters), len(self.partners))
+        if self.matrix.shape != expected:
+            raise ValueError(f"Matrix shape {self.matrix.shape} does not match {expected}")
+
+    @classmethod
+    def from_frame(cls, df, reporter_col, partner_col, weight_col, layer_col="Item",
+                   aggfunc="sum", index=None):
+        """
+        Build the multilayer network from a FAOSTAT-style trade DataFrame.
+
+        Takes the same arguments as `build_bipartite_network`, plus the
+        column whose values define the layers.
+
+        Parameters
+        ----------
+        layer_col : str, optional
+            Column identifying the layer of each flow (default 'Item').
+
+        Returns
+        -------
+        MultilayerTradeNetwork
+        """
+        grouped = df.groupby([layer_col, reporter_col, partner_col], sort=False,
+                             dropna=False, observed=True)
+        flows = grouped[weight_col].agg(aggfunc)
+
+        layer_codes, layers = pd.factorize(flows.index.get_level_values(0),
+                                           use_na_sentinel=False)
+        sources = flows.index.get_level_values(1)
+        targets = flows.index.get_level_values(2)
+        if index is None:
+            rows, reporters = pd.factorize(sources, use_na_sentinel=False)
+            cols, partners = pd.factorize(targets, use_na_sentinel=False)
+        else:
+            rows, cols = index.ids(sources), index.ids(targets)
+            reporters = partners = np.arange(len(index))
+
+        n_reporters = len(reporters)
+        matrix = sp.csr_array(
+            (flows.to_numpy(dtype=float), (layer_codes * n_reporters + rows, cols)),
+            shape=(len(layers) * n_reporters, len(partners)),
+        )
+        return cls(matrix, layers.tolist(), reporters, partners, index=index)
+
+    def layer(self, key):
+        """
+        Return one layer as a `BipartiteTradeNetwork`.
+
+        Without a country index, countries with no flows in the layer are
+        dropped, so the result matches `build_bipartite_network` on the
+        rows of that layer.
+        """
+        n = len(self.reporters)
+        start = self._positions[key] * n
+        block = self.matrix[start:start + n].tocoo()
+        return _network_from_codes(block.row, block.col, block.data, self.reporters,
+                                   self.partners, self.index)
+
+    def aggregate(self, keys=None):
+        """
+        Sum several layers into a single network.
+
+        Parameters
+        ----------
+        keys : list, optional
+            Layers to add up, e.g. all cereal items. None uses all layers.
+
+        Returns
+        -------
+        BipartiteTradeNetwork
+            Network whose weights are the sum over the selected layers.
+        """
+        n = len(self.reporters)
+        positions = (range(len(self.layers)) if keys is None
+                     else [self._positions[key] for key in keys])
+        # (n, n_layers * n) indicator adding up the rows of the selected
+        # layers, so only their blocks of the stacked matrix are touched
+        rows = np.concatenate([np.arange(n) for _ in positions] or [np.empty(0, int)])
+        cols = np.concatenate([np.arange(p * n, (p + 1) * n) for p in positions]
+                              or [np.empty(0, int)])
+        select = sp.csr_array((np.ones(len(rows)), (rows, cols)),
+                              shape=(n, self.matrix.shape[0]))
+        total = (select @ self.matrix).tocoo()
+        return _network_from_codes(total.row, total.col, total.data,
+                                   self.reporters, self.partners, self.index)
+
+    def strength(self, side=0):
+        """
+        Per-layer strength (sum of weights) of every reporter or partner.
+
+        Parameters
+        ----------
+        side : int, optional
+            0 for reporters (exporters), 1 for partners (importers).
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per layer and one column per country.
+        """
+        return self._layer_sums(self.matrix, side)
+
+    def degree(self, side=0):
+        """
+        Per-layer degree (number of partners) of every reporter or partner.
+
+        Parameters
+        ----------
+        side : int, optional
+            0 for reporters (exporters), 1 for partners (importers).
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per layer and one column per country.
+        """
+        m = self.matrix
+        ones = sp.csr_array((np.ones(m.nnz), m.indices, m.indptr), shape=m.shape)
+        return self._layer_sums(ones, side).astype(int)
+
+    def _layer_sums(self, matrix, side):
+        """Row (side 0) or per-layer column (side 1) sums of a stacked matrix."""
+        n_layers, n = len(self.layers), len(self.reporters)
+        if side == 0:
+            values = matrix.sum(axis=1).reshape(n_layers, n)
+            labels = self.reporters
+        else:
+            # (n_layers, n_layers * n) indicator of the rows of each layer
+            blocks = sp.csr_array(
+                (np.ones(n_layers * n), (np.repeat(np.arange(n_layers), n),
+                                         np.arange(n_layers * n))),
+                shape=(n_layers, n_layers * n),
+            )
+            values = (blocks @ matrix).toarray()
+            labels = self.partners
+        return pd.DataFrame(values, index=self.layers, columns=labels)
+
+    def __repr__(self):
+        return (f"MultilayerTradeNetwork(layers={len(self.layers)}, "
+                f"reporters={len(self.reporters)}, partners={len(self.partners)}, "
+                f"edges={self.matrix.nnz})")
+
+
+def _network_from_codes(rows, cols, weights, reporters, partners, index=None):
+    """
+    Build a network from flow codes into shared label arrays.
+
+    With a country index the network keeps the full aligned shape; otherwise
+    only the reporters and partners present in the flows are kept.
+    """
+    if index is not None:
+        matrix = sp.csr_array((weights, (rows, cols)),
+                              shape=(len(reporters), len(partners)))
+        return BipartiteTradeNetwork(matrix, reporters, partners, index=index)
+
+    rows, row_labels = pd.factorize(rows)
+    cols, col_labels = pd.factorize(cols)
+    matrix = sp.csr_array((weights, (rows, cols)),
+                          shape=(len(row_labels), len(col_labels)))
+    return BipartiteTradeNetwork(matrix, reporters[row_labels], partners[col_labels])
@@ -0,0 +1,272 @@
+import copy
+import inspect
+
+import pandas as pd
+
+from faonet.filtering import filter_top_percentile
+from faonet.io import DEFAULT_CHUNKSIZE, iter_file_chunks, load_file
+from faonet.metrics import (
+    compute_betweenness_all,
+    compute_bipartite_clustering,
+    compute_degree_and_strength,
+)
+from faonet.network import (
+    _aggregate_flows,
+    _graph_from_flows,
+    build_bipartite_network,
+    extract_backbone,
+    prune_edges,
+)
+
+# Reducers that can be applied to partial per-chunk aggregates and combined
+_STREAMABLE_AGGFUNCS = ("sum", "min", "max")
+
+# `load_file` options that the chunk reader also accepts
+_STREAM_OPTIONS = frozenset(inspect.signature(iter_file_chunks).parameters)
+
+
+class TradePipeline:
+    """
+    Lazy pipeline from a FAOSTAT file to a network and its metrics.
+
+    Each method records a step and returns a new pipeline; nothing is read
+    until `collect` is called. At that point the row filters and the columns
+    needed by the later steps are pushed down into the reader, and when no
+    DataFrame step sits between reading and `network`, the network is built
+    from per-chunk aggregates so the trade rows are never held in memory at
+    once. Use `explain` to see the plan.
+
+    Parameters
+    ----------
+    file : str or path-like
+        FAOSTAT CSV file or ZIP archive (see `faonet.io.load_file`).
+    chunksize : int, optional
+        Number of CSV rows parsed per chunk.
+    **load_options
+        Other options for `faonet.io.load_file`, e.g. `cache_dir`,
+        `member` or `encoding`.
+
+    Examples
+    --------
+    >>> results = (TradePipeline("trade.csv")
+    ...            .where(year=2023, item="Coffee, green")
+    ...            .network()
+    ...            .prune(min_share=0.01)
+    ...            .betweenness()
+    ...            .collect())
+    """
+
+    def __init__(self, file, chunksize=DEFAULT_CHUNKSIZE, **load_options):
+        self._file = file
+        self._chunksize = chunksize
+        self._load_options = load_options
+        self._filters = {}
+        self._columns = None
+        self._frame_steps = []
+        self._network = None
+        self._graph_steps = []
+        self._metrics = []
+
+    def where(self, year=None, item=None, element=None, flag=None):
+        """Keep only rows matching the given year, item, element and flag values."""
+        pipeline = self._copy()
+        values = {"year": year, "item": item, "element": element, "flag": flag}
+        pipeline._filters.update({k: v for k, v in values.items() if v is not None})
+        return pipeline
+
+    def select(self, columns):
+        """Load only `columns`, plus any column required by later steps."""
+        pipeline = self._copy()
+        pipeline._columns = list(columns)
+        return pipeline
+
+    def top_percentile(self, value_column="Value", percentile=0.9, by=None, top_k=None):
+        """Add a `filter_top_percentile` step on the loaded rows."""
+        self._check_before_network("top_percentile")
+        pipeline = self._copy()
+        kwargs = dict(value_column=value_column, percentile=percentile, by=by, top_k=top_k)
+        pipeline._frame_steps.append(("top_percentile", kwargs))
+        return pipeline
+
+    def network(self, reporter_col="Reporter Countries", partner_col="Partner Countries",
+                weight_col="Value", aggfunc="sum", index=None):
+        """Build the bipartite network (see `build_bipartite_network`)."""
+        self._check_before_network("network")
+        pipeline = self._copy()
+        pipeline._network = dict(reporter_col=reporter_col, partner_col=partner_col,
+                                 weight_col=weight_col, aggfunc=aggfunc, index=index)
+        return pipeline
+
+    def prune(self, **kwargs):
+        """Add a `prune_edges` step on the network."""
+        return self._add_graph_step("prune", prune_edges, kwargs)
+
+    def backbone(self, **kwargs):
+        """Add an `extract_backbone` step on the network."""
+        return self._add_graph_step("backbone", extract_backbone, kwargs)
+
+    def degree_and_strength(self, name="degree_and_strength"):
+        """Request `compute_degree_and_strength` on the final network."""
+        return self._add_metric(name, compute_degree_and_strength, {}, groups="both")
+
+    def betweenness(self, name="betweenness", **kwargs):
+        """Request `compute_betweenness_all` on the final network."""
+        return self._add_metric(name, compute_betweenness_all, kwargs)
+
+    def clustering(self, name="clustering", **kwargs):
+        """Request `compute_bipartite_clustering` on the final network."""
+        return self._add_metric(name, compute_bipartite_clustering, kwargs,
+                                groups="reporters")
+
+    def metric(self, name, func, **kwargs):
+        """Request `func(G, **kwargs)` on the final network, stored under `name`."""
+        return self._add_metric(name, func, kwargs)
+
+    def explain(self):
+        """
+        Describe the execution plan.
+
+        Returns
+        -------
+        str
+            One line per step, showing the filters and columns pushed into the
+            reader and whether the network is built from streamed aggregates.
+        """
+        lines = [f"load {self._file}: filters={self._filters or None}, "
+                 f"columns={self._load_columns() or 'all'}"]
+        for name, kwargs in self._frame_steps:
+            lines.append(f"{name}: {kwargs}")
+        if self._network is not None:
+            mode = "streamed per-chunk aggregation" if self._streams() else "from loaded rows"
+            columns = (self._network["reporter_col"], self._network["partner_col"],
+                       self._network["weight_col"])
+            lines.append(f"network {columns}: {mode}, aggfunc={self._network['aggfunc']!r}")
+        for name, _, kwargs in self._graph_steps:
+            lines.append(f"{name}: {kwargs}")
+        for name, func, kwargs, _ in self._metrics:
+            lines.append(f"metric {name}: {func.__name__}({kwargs})")
+        return "\n".join(lines)
+
+    def collect(self):
+        """
+        Execute the pipeline.
+
+        Returns
+        -------
+        pd.DataFrame, tuple or dict
+            The filtered DataFrame if no network is requested; the
+            (B, reporters, partners) tuple of `build_bipartite_network` if no
+            metric is requested; otherwise a dict mapping each metric name to
+            its result.
+        """
+        if self._network is None:
+            return self._load_frame()
+
+        if self._streams():
+            flows = self._stream_flows()
+            B, reporters, partners = _graph_from_flows(flows, self._network["index"])
+        else:
+            df = self._load_frame()
+            B, reporters, partners = build_bipartite_network(df, **self._network)
+
+        for _, func, kwargs in self._graph_steps:
+            func(B, **kwargs)
+
+        if not self._metrics:
+            return B, reporters, partners
+
+        results = {}
+        for name, func, kwargs, groups in self._metrics:
+            if groups == "both":
+                results[name] = func(B, reporters, partners, **kwargs)
+            elif groups == "reporters":
+                results[name] = func(B, reporters=reporters, **kwargs)
+            else:
+                results[name] = func(B, **kwargs)
+        return results
+
+    def _copy(self):
+        pipeline = copy.copy(self)
+        pipeline._filters = dict(self._filters)
+        pipeline._frame_steps = list(self._frame_steps)
+        pipeline._graph_steps = list(self._graph_steps)
+        pipeline._metrics = list(self._metrics)
+        return pipeline
+
+    def _check_before_network(self, step):
+        if self._network is not None:
+            raise ValueError(f"'{step}' must come before 'network' in the pipeline")
+
+    def _add_graph_step(self, name, func, kwargs):
+        if self._network is None:
+            raise ValueError(f"'{name}' needs a 'network' step first")
+        if self._metrics:
+            raise ValueError(f"'{name}' must come before the metrics")
+        pipeline = self._copy()
+        pipeline._graph_steps.append((name, func, kwargs))
+        return pipeline
+
+    def _add_metric(self, name, func, kwargs, groups=None):
+        """Record a metric; `groups` says which node groups `func` takes after G."""
+        if self._network is None:
+            raise ValueError(f"Metric '{name}' needs a 'network' step first")
+        pipeline = self._copy()
+        pipeline._metrics.append((name, func, kwargs, groups))
+        return pipeline
+
+    def _load_columns(self):
+        """Columns to read: the selection plus those used by later steps, or None for all."""
+        needed = []
+        for _, kwargs in self._frame_steps:
+            needed.append(kwargs["value_column"])
+            by = kwargs["by"]
+            if by is not None:
+                needed.extend([by] if isinstance(by, str) else by)
+        if self._network is not None:
+            needed.extend([self._network["reporter_col"], self._network["partner_col"],
+                           self._network["weight_col"]])
+        elif self._columns is None:
+            return None
+
+        columns = list(self._columns or []) + needed
+        return list(dict.fromkeys(columns))
+
+    def _streams(self):
+        """True if the network can be built from per-chunk aggregates."""
+        return (self._network is not None and not self._frame_steps
+                and self._network["aggfunc"] in _STREAMABLE_AGGFUNCS
+                and self._load_options.get("cache_dir") is None)
+
+    def _load_frame(self):
+        df = load_file(self._file, year=self._filters.get("year"),
+                       item=self._filters.get("item"), element=self._filters.get("element"),
+                       flag=self._filters.get("flag"), usecols=self._load_columns(),
+                       chunksize=self._chunksize, **self._load_options)
+        for name, kwargs in self._frame_steps:
+            if name == "top_percentile":
+                df = filter_top_percentile(df, **kwargs)
+        return df
+
+    def _stream_flows(self):
+        """Aggregate the flows chunk by chunk and combine the partial results."""
+        reporter_col = self._network["reporter_col"]
+        partner_col = self._network["partner_col"]
+        weight_col = self._network["weight_col"]
+        aggfunc = self._network["aggfunc"]
+
+        # Options such as cache_dir=None only matter to `load_file`
+        options = {k: v for k, v in self._load_options.items() if k in _STREAM_OPTIONS}
+        partials = []
+        for chunk in iter_file_chunks(self._file, usecols=self._load_columns(),
+                                      chunksize=self._chunksize,
+                                      **self._filters, **options):
+            partials.append(_aggregate_flows(chunk, reporter_col, partner_col,
+                                             weight_col, aggfunc))
+        if not partials:
+            empty = pd.DataFrame(columns=[reporter_col, partner_col, weight_col])
+            return _aggregate_flows(empty, reporter_col, partner_col, weight_col, aggfunc)
+        if len(partials) == 1:
+            return partials[0]
+        grouped = pd.concat(partials).groupby(level=[0, 1], sort=False, dropna=False,
+                                              observed=True)
+        return grouped.agg(aggfunc)
@@ -1,10 +1,23 @@
 
+import time
+import zipfile
+from pathlib import Path
+import numpy as np
 import pytest
 import pandas as pd
 import networkx as nx
 from faonet.metrics import compute_degree_and_strength
-from faonet.network import build_bipartite_network
-from faonet.metrics import compute_bipartite_clustering
+from faonet.network import (
+    BipartiteTradeNetwork, CountryIndex, MultilayerTradeNetwork,
+    apply_trade_delta, build_bipartite_network, build_item_networks, edge_significance,
+    extract_backbone, prune_edges,
+    remove_zero_weight_edges, weighted_projection,
+)
+from faonet.metrics import compute_betweenness_all, compute_bipartite_clustering, edge_lengths
+from faonet.filtering import filter_top_percentile
+from faonet.pipeline import TradePipeline
+from faonet.cache import MetricCache, graph_fingerprint
+from faonet.io import convert_to_parquet, load_and_merge_csv, load_file, load_years, memory_report
 
 def test_build_graph_and_compute_metrics():
     data = {
@@ -29,3 +42,525 @@ def test_clustering_does_not_fail():
     df_clust = compute_bipartite_clustering(B)
     assert "C4b" in df_clust.columns
     assert "C4b^w" in df_clust.columns
+
+def _write_trade_csv(path):
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'B', 'C', 'A', 'B'],
+        'Partner Countries': ['X', 'Y', 'Y', 'Z', 'X', 'Z'],
+        'Item': ['Coffee', 'Coffee', 'Tea', 'Coffee', 'Coffee', 'Tea'],
+        'Element': ['Export quantity'] * 6,
+        'Year': [2022, 2022, 2022, 2023, 2023, 2023],
+        'Value': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0],
+        'Flag': ['A', 'A', 'E', 'A', 'A', 'A'],
+    })
+    df.to_csv(path, index=False)
+    return df
+
+def test_load_file_filters_while_streaming(tmp_path):
+    path = tmp_path / "trade.csv"
+    full = _write_trade_csv(path)
+    df = load_file(path, year=2023, item="Coffee", usecols=["Reporter Countries", "Value"], chunksize=2)
+
+    expected = full[(full["Year"] == 2023) & (full["Item"] == "Coffee")]
+    assert list(df.columns) == ["Reporter Countries", "Value"]
+    assert list(df.index) == list(expected.index)
+    assert df["Value"].tolist() == expected["Value"].tolist()
+
+def test_load_years_single_pass(tmp_path):
+    path = tmp_path / "trade.csv"
+    full = _write_trade_csv(path)
+    panel = load_years(path, usecols=["Reporter Countries", "Value"], chunksize=4)
+    lazy = load_years(path, lazy=True)
+
+    assert list(panel) == [2022, 2023]
+    assert list(panel[2022].columns) == ["Reporter Countries", "Value", "Year"]
+    assert panel[2023]["Value"].tolist() == full.loc[full["Year"] == 2023, "Value"].tolist()
+    assert lazy[2022].equals(load_file(path, year=2022))
+
+def test_parquet_cache_matches_csv(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "trade.csv"
+    _write_trade_csv(path)
+    cache_dir = tmp_path / "cache"
+
+    from_csv = load_file(path, year=2023, flag="A")
+    from_cache = load_file(path, year=2023, flag="A", cache_dir=cache_dir)
+    again = load_file(path, year=2023, flag="A", cache_dir=cache_dir)
+
+    key = ["Reporter Countries", "Partner Countries", "Item"]
+    expected = from_csv.sort_values(key).reset_index(drop=True)
+    for df in (from_cache, again):
+        assert list(df.columns) == list(from_csv.columns)
+        assert df.sort_values(key).reset_index(drop=True)["Value"].tolist() == expected["Value"].tolist()
+    assert len(list(cache_dir.iterdir())) == 1
+
+    # Chunks are streamed into one writer: one file per partition, not per chunk
+    dataset = convert_to_parquet(path, tmp_path / "chunked", chunksize=1)
+    assert sorted(p.parent.name for p in Path(dataset).rglob("*.parquet")) == ["Year=2022", "Year=2023"]
+
+def test_compact_load_keeps_values(tmp_path):
+    path = tmp_path / "trade.csv"
+    pd.concat([_write_trade_csv(path)] * 50).to_csv(path, index=False)
+    full = load_file(path, year=None)
+    compact = load_file(path, year=None, compact=True, float32=True, chunksize=64)
+    report = memory_report(full, compact)
+
+    assert isinstance(compact["Reporter Countries"].dtype, pd.CategoricalDtype)
+    assert compact["Year"].dtype == "int16"
+    assert compact["Value"].dtype == "float32"
+    assert compact["Reporter Countries"].astype(str).tolist() == full["Reporter Countries"].tolist()
+    assert report.loc["Total", "saved"] > 0
+
+def test_parallel_merge_matches_sequential(tmp_path):
+    paths = []
+    for year in (2022, 2023):
+        path = tmp_path / f"trade_{year}.csv"
+        df = _write_trade_csv(path)
+        df[df["Year"] == year].to_csv(path, index=False)
+        paths.append(path)
+
+    sequential = load_and_merge_csv(paths)
+    parallel = load_and_merge_csv(paths, workers=2, compact=True)
+
+    assert len(parallel) == len(sequential)
+    assert isinstance(parallel["Item"].dtype, pd.CategoricalDtype)
+    assert parallel["Item"].astype(str).tolist() == sequential["Item"].tolist()
+    assert parallel["Value"].tolist() == sequential["Value"].tolist()
+
+def test_load_file_reads_zip_member(tmp_path):
+    csv_path = tmp_path / "Trade_E_All_Data_(Normalized).csv"
+    full = _write_trade_csv(csv_path)
+    archive = tmp_path / "Trade_E_All_Data_(Normalized).zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.write(csv_path, csv_path.name)
+        zf.writestr("Trade_E_Flags.csv", "Flag,Flags\nA,Official figure\n")
+
+    df = load_file(archive, year=2022, chunksize=2)
+    assert df["Value"].tolist() == full.loc[full["Year"] == 2022, "Value"].tolist()
+    assert list(load_years(archive)) == [2022, 2023]
+
+def test_build_network_aggregates_duplicate_pairs():
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'B'],
+        'Partner Countries': ['X', 'X', 'X'],
+        'Value': [10, 5, 30],
+    })
+    B, _, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    B_last, _, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value', aggfunc="last")
+
+    assert B['A']['X']['weight'] == 15
+    assert B_last['A']['X']['weight'] == 5
+    assert B.nodes['A']['bipartite'] == 0 and B.nodes['X']['bipartite'] == 1
+
+def test_sparse_network_round_trip():
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'B', 'C', 'A'],
+        'Partner Countries': ['X', 'Y', 'Y', 'Z', 'X'],
+        'Value': [10.0, 20.0, 0.0, 40.0, 5.0],
+    })
+    G, _, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    net = BipartiteTradeNetwork.from_frame(df, 'Reporter Countries', 'Partner Countries', 'Value')
+
+    assert net.shape == (3, 3) and net.nnz == 4
+    assert nx.utils.graphs_equal(net.to_graph(), G)
+    assert nx.utils.graphs_equal(BipartiteTradeNetwork.from_graph(G).to_graph(), G)
+
+def test_country_index_aligns_years(tmp_path):
+    cols = ['Reporter Country Code (M49)', 'Reporter Countries',
+            'Partner Country Code (M49)', 'Partner Countries', 'Value']
+    y1 = pd.DataFrame([[4, 'A', 8, 'X', 1.0], [12, 'B', 8, 'X', 2.0]], columns=cols)
+    y2 = pd.DataFrame([[12, 'B', 16, 'Y', 3.0]], columns=cols)
+    index = CountryIndex.from_frame(y1).update(y2)
+    index.save(tmp_path / "countries.csv")
+    index = CountryIndex.load(tmp_path / "countries.csv")
+
+    net1, net2 = (BipartiteTradeNetwork.from_frame(df, cols[0], cols[2], 'Value', index=index) for df in (y1, y2))
+    G2, reporters, _ = build_bipartite_network(y2, cols[0], cols[2], 'Value', index=index)
+
+    assert net1.shape == net2.shape == (4, 4)
+    assert list(index.names) == ['A', 'B', 'X', 'Y']
+    assert reporters == {1} and G2[1][3]['weight'] == 3.0
+    assert nx.utils.graphs_equal(net2.to_graph(), G2)
+
+def test_country_index_round_trips_key_types(tmp_path):
+    for keys in (["004", "010"], [4, 10]):
+        CountryIndex(keys, ["A", "NA"]).save(tmp_path / "countries.csv")
+        index = CountryIndex.load(tmp_path / "countries.csv")
+        assert list(index.ids(keys)) == [0, 1]
+        assert list(index.names) == ["A", "NA"]
+
+def test_item_networks_match_per_item_builds():
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'B', 'C', 'A', 'B', 'A'],
+        'Partner Countries': ['X', 'Y', 'Y', 'Z', 'X', 'Z', 'X'],
+        'Item': ['Coffee', 'Coffee', 'Tea', 'Coffee', 'Tea', 'Tea', 'Coffee'],
+        'Year': [2022, 2022, 2022, 2023, 2023, 2023, 2022],
+        'Value': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 5.0],
+    })
+    networks = build_item_networks(df, 'Reporter Countries', 'Partner Countries', 'Value', year_col='Year')
+
+    assert set(networks) == {('Coffee', 2022), ('Tea', 2022), ('Coffee', 2023), ('Tea', 2023)}
+    for item, year in networks:
+        subset = df[(df['Item'] == item) & (df['Year'] == year)]
+        G, _, _ = build_bipartite_network(subset, 'Reporter Countries', 'Partner Countries', 'Value')
+        assert nx.utils.graphs_equal(networks.graph((item, year)), G)
+
+def test_multilayer_slices_and_aggregates():
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'B', 'C', 'A', 'B'],
+        'Partner Countries': ['X', 'Y', 'Y', 'Z', 'X', 'Z'],
+        'Item': ['Wheat', 'Wheat', 'Maize', 'Beef', 'Maize', 'Maize'],
+        'Value': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0],
+    })
+    ml = MultilayerTradeNetwork.from_frame(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    cereals = df[df['Item'].isin(['Wheat', 'Maize'])]
+    G_cereals, _, _ = build_bipartite_network(cereals, 'Reporter Countries', 'Partner Countries', 'Value')
+    G_beef, _, _ = build_bipartite_network(df[df['Item'] == 'Beef'], 'Reporter Countries', 'Partner Countries', 'Value')
+
+    assert nx.utils.graphs_equal(ml.aggregate(['Wheat', 'Maize']).to_graph(), G_cereals)
+    assert nx.utils.graphs_equal(ml.layer('Beef').to_graph(), G_beef)
+    assert ml.strength(side=0).loc['Maize', 'A'] == 50.0
+    assert ml.strength(side=1).loc['Maize', 'Z'] == 60.0
+    assert ml.degree(side=1).loc['Wheat'].tolist() == [1, 1, 0]
+
+def test_trade_delta_matches_rebuild():
+    cols = ['Reporter Countries', 'Partner Countries', 'Value']
+    df = pd.DataFrame([['A', 'X', 10.0], ['A', 'Y', 20.0], ['B', 'Y', 30.0], ['C', 'Z', 40.0]], columns=cols)
+    delta = pd.DataFrame([['A', 'X', 5.0, 'insert'], ['B', 'Y', 1.0, 'update'],
+                          ['C', 'Z', 0.0, 'delete'], ['D', 'X', 7.0, 'insert']], columns=cols + ['Change'])
+    revised = pd.DataFrame([['A', 'X', 15.0], ['A', 'Y', 20.0], ['B', 'Y', 1.0], ['D', 'X', 7.0]], columns=cols)
+    expected, _, _ = build_bipartite_network(revised, *cols)
+
+    G, _, _ = build_bipartite_network(df, *cols)
+    touched = apply_trade_delta(G, delta, *cols)
+    net = BipartiteTradeNetwork.from_frame(df, *cols)
+    net.apply_delta(delta, *cols)
+
+    assert touched == {'A', 'B', 'C', 'D', 'X', 'Y', 'Z'}
+    assert nx.utils.graphs_equal(G, expected)
+    assert nx.utils.graphs_equal(net.to_graph(), expected)
+
+def test_prune_edges_graph_and_sparse_agree():
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'A', 'B', 'C', 'C'],
+        'Partner Countries': ['X', 'Y', 'Z', 'Y', 'Z', 'X'],
+        'Value': [100.0, 1.0, 0.0, 2.0, 50.0, 3.0],
+    })
+    cols = ['Reporter Countries', 'Partner Countries', 'Value']
+    G, _, _ = build_bipartite_network(df, *cols)
+    net = BipartiteTradeNetwork.from_frame(df, *cols)
+
+    prune_edges(G, min_share=0.5)
+    prune_edges(net, min_share=0.5)
+
+    assert set(map(frozenset, G.edges())) == {frozenset(e) for e in [('A', 'X'), ('B', 'Y'), ('C', 'Z')]}
+    assert nx.utils.graphs_equal(net.to_graph(), G)
+    assert remove_zero_weight_edges(nx.Graph([('A', 'X', {'weight': 0})])).number_of_edges() == 0
+
+def test_backbone_keeps_locally_dominant_flows():
+    df = pd.DataFrame({
+        'Reporter Countries': ['A'] * 6 + ['B', 'B'],
+        'Partner Countries': ['U', 'V', 'W', 'X', 'Y', 'Z', 'U', 'V'],
+        'Value': [1000.0, 5.0, 5.0, 5.0, 5.0, 5.0, 9.0, 1.0],
+    })
+    cols = ['Reporter Countries', 'Partner Countries', 'Value']
+    G, _, _ = build_bipartite_network(df, *cols)
+    table = edge_significance(G)
+    a_u = table[(table['reporter'] == 'A') & (table['partner'] == 'U')].iloc[0]
+    assert a_u['pvalue_reporter'] == pytest.approx((1 - 1000 / 1025) ** 5)
+
+    extract_backbone(G, alpha=0.05)
+    net = extract_backbone(BipartiteTradeNetwork.from_frame(df, *cols), alpha=0.05)
+    assert set(map(frozenset, G.edges())) == {frozenset(('A', 'U'))}
+    assert nx.utils.graphs_equal(net.to_graph(), G)
+    assert extract_backbone(build_bipartite_network(df, *cols)[0], method="polya").has_edge('A', 'U')
+
+def test_polya_backbone_parameterisation_and_large_strengths():
+    from scipy.stats import betabinom
+    df = pd.DataFrame({
+        'Reporter Countries': ['A'] * 6 + ['B', 'B'],
+        'Partner Countries': ['U', 'V', 'W', 'X', 'Y', 'Z', 'U', 'V'],
+        'Value': [1000.0, 5.0, 5.0, 5.0, 5.0, 5.0, 9.0, 1.0],
+    })
+    cols = ['Reporter Countries', 'Partner Countries', 'Value']
+    G, _, _ = build_bipartite_network(df, *cols)
+
+    def a_u(table):
+        return table[(table['reporter'] == 'A') & (table['partner'] == 'U')].iloc[0]
+
+    pvalues = {a: a_u(edge_significance(G, method="polya", a=a))['pvalue_reporter']
+               for a in (0.5, 2.0)}
+    for a, p in pvalues.items():
+        assert p == pytest.approx(betabinom.sf(999, 1025, 1 / a, 5 / a))
+    assert pvalues[0.5] < pvalues[2.0]
+
+    # Trade-sized strengths use the Beta limit, which at a = 1 is the disparity filter
+    big = df.assign(Value=df['Value'] * 1e6)
+    B, _, _ = build_bipartite_network(big, *cols)
+    polya = edge_significance(B, method="polya", a=1.0)
+    disparity = edge_significance(B)
+    np.testing.assert_allclose(polya['pvalue_reporter'], disparity['pvalue_reporter'], rtol=1e-9)
+    assert a_u(edge_significance(B, method="polya", a=3.0))['pvalue_reporter'] > a_u(polya)['pvalue_reporter']
+
+def test_filter_top_percentile_grouped():
+    df = pd.DataFrame({
+        'Year': [2022, 2022, 2022, 2023, 2023, 2023],
+        'Value': [70.0, 20.0, 10.0, 5.0, 90.0, 5.0],
+    })
+    grouped = filter_top_percentile(df, percentile=0.9, by='Year')
+    per_year = pd.concat(filter_top_percentile(g, percentile=0.9) for _, g in df.groupby('Year'))
+    top1 = filter_top_percentile(df, by='Year', top_k=1)
+
+    assert sorted(grouped.index) == sorted(per_year.index)
+    assert list(grouped.columns) == ['Year', 'Value']
+    assert top1['Value'].tolist() == [70.0, 90.0]
+
+def test_pipeline_matches_eager_steps(tmp_path):
+    path = tmp_path / "trade.csv"
+    _write_trade_csv(path)
+    cols = ['Reporter Countries', 'Partner Countries', 'Value']
+    pipeline = TradePipeline(path, chunksize=2).where(year=2023).network().degree_and_strength()
+    filtered = TradePipeline(path).where(year=2022).top_percentile(percentile=0.6).network()
+
+    exporters, _ = pipeline.collect()["degree_and_strength"]
+    G, _, _ = filtered.collect()
+    eager, _, _ = build_bipartite_network(
+        filter_top_percentile(load_file(path, year=2022), percentile=0.6), *cols)
+
+    assert "streamed" in pipeline.explain()
+    assert exporters.loc['A', 'Strength'] == 50.0 and exporters.loc['B', 'Strength'] == 60.0
+    assert nx.utils.graphs_equal(G, eager)
+
+    # load_file-only options such as an explicit cache_dir=None still stream
+    explicit = TradePipeline(path, cache_dir=None).where(year=2022).network()
+    assert "streamed" in explicit.explain()
+    G, _, _ = explicit.collect()
+    assert G.number_of_edges() > 0
+
+def test_degree_and_strength_graph_and_sparse_agree():
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'B', 'C', 'A'],
+        'Partner Countries': ['X', 'Y', 'Y', 'Z', 'X'],
+        'Value': [10.0, 20.0, 30.0, 40.0, 5.0],
+    })
+    cols = ['Reporter Countries', 'Partner Countries', 'Value']
+    B, reporters, partners = build_bipartite_network(df, *cols)
+    exp_graph, imp_graph = compute_degree_and_strength(B, reporters, partners)
+    exp_sparse, imp_sparse = compute_degree_and_strength(BipartiteTradeNetwork.from_frame(df, *cols))
+
+    assert exp_graph.loc['A'].tolist() == [2, 35.0]
+    assert imp_graph.loc['Y'].tolist() == [2, 50.0]
+    pd.testing.assert_frame_equal(exp_graph.sort_index(), exp_sparse.sort_index(), check_dtype=False)
+    pd.testing.assert_frame_equal(imp_graph.sort_index(), imp_sparse.sort_index(), check_dtype=False)
+
+def test_sparse_clustering_matches_python_engine():
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'A', 'B', 'B', 'C', 'C', 'X'],
+        'Partner Countries': ['X', 'Y', 'Z', 'X', 'Y', 'Y', 'Z', 'B'],
+        'Value': [10.0, 20.0, 5.0, 30.0, 1.0, 4.0, 8.0, 2.0],
+    })
+    B, reporters, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    for normalized in (True, False):
+        expected = compute_bipartite_clustering(B, reporters, normalized, engine="python")
+        result = compute_bipartite_clustering(B, reporters, normalized)
+        assert result["node"].tolist() == expected["node"].tolist()
+        assert result["C4b"].tolist() == expected["C4b"].tolist()
+        np.testing.assert_allclose(result["C4b^w"], expected["C4b^w"], rtol=1e-12)
+
+def test_parallel_betweenness_matches_serial():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Reporter Countries': rng.choice(list('ABCDEF'), 40),
+        'Partner Countries': rng.choice(list('PQRSTUV'), 40),
+        'Value': rng.integers(1, 100, 40).astype(float),
+    })
+    B, _, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    serial = compute_betweenness_all(B)
+    parallel = compute_betweenness_all(B, workers=2)
+    pd.testing.assert_frame_equal(serial, parallel, check_exact=False, rtol=1e-12)
+
+def test_sampled_betweenness_reports_bounds():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'Reporter Countries': rng.integers(0, 40, 300).astype(str),
+        'Partner Countries': ['p' + str(i) for i in rng.integers(0, 40, 300)],
+        'Value': rng.integers(1, 100, 300).astype(float),
+    })
+    B, _, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    exact = compute_betweenness_all(B)
+    approx = compute_betweenness_all(B, sample_size=20, seed=0)
+
+    pd.testing.assert_frame_equal(approx, compute_betweenness_all(B, sample_size=20, seed=0))
+    for column in exact.columns[2:]:
+        bound = approx[f"{column}_error"].iloc[0]
+        assert 0 < bound < 1
+        assert (approx[column] - exact[column]).abs().max() <= bound
+
+    full = compute_betweenness_all(B, sample_size=len(B), seed=0)
+    assert (full.filter(like="_error") == 0).all().all()
+    np.testing.assert_allclose(full["betweenness_bipartite"], exact["betweenness_bipartite"])
+
+def test_weighted_projection_matches_networkx():
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'B', 'B', 'C', 'C'],
+        'Partner Countries': ['X', 'Y', 'X', 'Y', 'Y', 'Z'],
+        'Value': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+    B, reporters, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    expected = nx.bipartite.weighted_projected_graph(B, reporters)
+    nodes, P = weighted_projection(B, side=0)
+    position = {node: i for i, node in enumerate(nodes)}
+
+    assert sorted(nodes) == ['A', 'B', 'C']
+    assert P.nnz == 2 * expected.number_of_edges()
+    for u, v, w in expected.edges(data='weight'):
+        assert P[position[u], position[v]] == w
+
+    net = BipartiteTradeNetwork.from_frame(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    nodes, P = weighted_projection(net, side=0, method='product')
+    position = {node: i for i, node in enumerate(nodes)}
+    assert P[position['A'], position['B']] == 1 * 3 + 2 * 4
+    nodes, P = weighted_projection(net, side=0, method='min')
+    position = {node: i for i, node in enumerate(nodes)}
+    assert P[position['A'], position['B']] == 1 + 2
+    assert P[position['A'], position['C']] == 2
+
+def test_zero_weight_edges_are_not_shortcuts():
+    G = nx.Graph()
+    G.add_nodes_from(['A', 'B'], bipartite=0)
+    G.add_nodes_from(['X', 'Y'], bipartite=1)
+    G.add_weighted_edges_from([('A', 'X', 1.0), ('B', 'X', 2.0), ('B', 'Y', 4.0), ('A', 'Y', 0.0)])
+
+    view, length = edge_lengths(G)
+    assert G.number_of_edges() == 4 and view.number_of_edges() == 3
+    assert length('B', 'Y', G['B']['Y']) == 0.25
+    assert nx.shortest_path_length(view, 'A', 'Y', weight=length) == 1 + 0.5 + 0.25
+
+    df = compute_betweenness_all(G).set_index('node')
+    assert df.loc['X', 'betweenness_bipartite_inv'] > 0
+    assert df.loc['B', 'betweenness_bipartite_inv'] > 0
+    for transform in ('neglog', 'normalized_inverse'):
+        other = compute_betweenness_all(G, transform=transform).set_index('node')
+        assert (other['betweenness_bipartite_inv'] <= 1).all()
+
+def test_betweenness_without_zero_weights_skips_the_view():
+    G = nx.bipartite.random_graph(30, 30, 0.3, seed=1)
+    for u, v in G.edges():
+        G[u][v]['weight'] = 1.0 + (u * v) % 7
+    assert edge_lengths(G)[0] is G
+
+    def best_time(f):
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            result = f()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    baseline, expected = best_time(lambda: nx.betweenness_centrality(G, weight='weight'))
+    elapsed, df = best_time(lambda: compute_betweenness_all(G, metrics='betweenness_bipartite'))
+    assert df.set_index('node')['betweenness_bipartite'].to_dict() == pytest.approx(expected)
+    # A filtered view made this several times slower than plain NetworkX
+    assert elapsed < 2 * baseline + 0.05
+
+def test_csr_betweenness_engine_matches_networkx():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        'Reporter Countries': rng.choice(list('ABCDEFGH'), 60),
+        'Partner Countries': rng.choice(list('PQRSTUAB'), 60),
+        'Value': rng.integers(0, 20, 60).astype(float),
+    })
+    B, _, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    for transform in ('inverse', 'neglog'):
+        expected = compute_betweenness_all(B, transform=transform)
+        result = compute_betweenness_all(B, transform=transform, engine='csr')
+        pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+
+    # Zero-weight edges, on which NetworkX's path counting depends on
+    # neighbour order, are left out by both engines
+    G = nx.Graph()
+    G.add_nodes_from('ABCD', bipartite=0)
+    G.add_nodes_from('UVW', bipartite=1)
+    G.add_weighted_edges_from([('A', 'V', 3.0), ('A', 'W', 2.0), ('B', 'U', 3.0), ('B', 'V', 3.0),
+                               ('C', 'V', 0.0), ('C', 'W', 0.0), ('D', 'U', 3.0), ('D', 'W', 3.0)])
+    expected = compute_betweenness_all(G, metrics=['betweenness_bipartite'])
+    result = compute_betweenness_all(G, metrics=['betweenness_bipartite'], engine='csr')
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+    assert expected.set_index('node').loc['C', 'betweenness_bipartite'] == 0
+
+def test_betweenness_metric_subset(monkeypatch):
+    import faonet.metrics as metrics_module
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'B', 'B', 'C'],
+        'Partner Countries': ['X', 'Y', 'X', 'Z', 'Z'],
+        'Value': [1.0, 2.0, 3.0, 4.0, 5.0],
+    })
+    B, _, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    full = compute_betweenness_all(B)
+
+    sides = []
+    projection_graph = metrics_module._projection_graph
+    monkeypatch.setattr(metrics_module, '_projection_graph',
+                        lambda G, side: sides.append(side) or projection_graph(G, side))
+    columns = ['betweenness_proj_exporters_inv', 'betweenness_bipartite']
+    subset = compute_betweenness_all(B, metrics=columns)
+
+    assert sides == [0]
+    assert subset.columns.tolist() == ['node', 'bipartite_set'] + columns
+    pd.testing.assert_frame_equal(subset, full[subset.columns])
+    with pytest.raises(ValueError):
+        compute_betweenness_all(B, metrics=['betweenness_unknown'])
+
+def test_metric_cache_keys_on_graph_content(tmp_path):
+    df = pd.DataFrame({
+        'Reporter Countries': ['A', 'A', 'B', 'C'],
+        'Partner Countries': ['X', 'Y', 'Y', 'Z'],
+        'Value': [10.0, 20.0, 30.0, 40.0],
+    })
+    B, reporters, _ = build_bipartite_network(df, 'Reporter Countries', 'Partner Countries', 'Value')
+    shuffled, _, _ = build_bipartite_network(df.iloc[::-1], 'Reporter Countries',
+                                             'Partner Countries', 'Value')
+    assert graph_fingerprint(B) == graph_fingerprint(shuffled)
+
+    calls = []
+
+    def clustering(G, reporters=None, normalized=True):
+        calls.append(normalized)
+        return compute_bipartite_clustering(G, reporters, normalized)
+
+    cache = MetricCache(maxsize=2, cache_dir=tmp_path)
+    cached = cache.wrap(clustering)
+    first = cached(B, reporters)
+    pd.testing.assert_frame_equal(cached(shuffled, set(reporters)), first)
+    cached(B, reporters, normalized=False)
+    assert calls == [True, False] and (cache.hits, cache.misses) == (1, 2)
+
+    B['A']['X']['weight'] = 11.0
+    cached(B, reporters)
+    assert len(calls) == 3
+
+    # A new session reads the disk tier; a size limit evicts the oldest files
+    fresh = MetricCache(cache_dir=tmp_path).wrap(clustering)
+    pd.testing.assert_frame_equal(fresh(shuffled, reporters), first)
+    assert len(calls) == 3
+    assert len(list(tmp_path.glob('*.pkl'))) == 3
+    MetricCache(cache_dir=tmp_path, max_bytes=0)
+    assert not list(tmp_path.glob('*.pkl'))
+
+    # Parameters are keyed by content, not by their (truncated) repr
+    summed = MetricCache().wrap(lambda G, values: float(values.sum()))
+    values = np.zeros(2000)
+    changed = values.copy()
+    changed[1000] = 1.0
+    assert (summed(B, values), summed(B, changed)) == (0.0, 1.0)
+    with pytest.raises(TypeError):
+        summed(B, object())
+
+    # Editing a metric changes its key, so stale results on disk are not served
+    def density(G):
+        return nx.density(G)
+    key = cache.key(density, B, {})
+
+    def density(G):
+        return 2 * nx.density(G)
+    assert cache.key(density, B, {}) != key